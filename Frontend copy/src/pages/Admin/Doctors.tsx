@@ -99,8 +99,9 @@ const Doctors = () => {
         return;
       }
 
-      // Build query parameters
-      const params = new URLSearchParams();
+      // Build query parameters (the list is keyset-paginated and only
+      // includes the total count when asked for it)
+      const params = new URLSearchParams({ with_count: "true" });
       if (searchTerm) {
         params.append("search", searchTerm);
       }
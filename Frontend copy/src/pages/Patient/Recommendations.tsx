@@ -197,7 +197,7 @@ const Recommendations = () => {
   useEffect(() => {
     const fetchDoctors = async () => {
       try {
-        const response = await fetch("http://localhost:8000/api/doctors/");
+        const response = await fetch("http://localhost:8000/api/doctors/?compact=true");
         const data = await response.json();
         // API returns paginated results, extract the results array
         const allDoctors = data.results || data;
@@ -0,0 +1,122 @@
+"""
+Prediction Latency Microbenchmark
+Compares the per-request cost of the old pandas DataFrame encoding with the
+NumPy index-scatter path used by flask_api.predict, and the old
+difflib.get_close_matches lookup with the SymptomMatcher index
+
+Run from this folder (needs the model files next to it):
+    python benchmark_predict.py [n_requests]
+"""
+import sys
+import io
+sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+import time
+import random
+import difflib
+import numpy as np
+import pandas as pd
+
+import flask_api
+from symptom_matcher import SymptomMatcher, normalize_name
+
+model = flask_api.specialist_model
+# Normalized feature name -> feature column, as matched by the model's SymptomMatcher
+lower_map = model.matcher.lower_map
+lower_names = model.matcher.names
+
+
+def legacy_predict(symptoms):
+    """Per-request encoding as it was before: fresh one-row DataFrame + .at writes"""
+    sample = pd.DataFrame([[0]*len(model.feature_columns)], columns=model.feature_columns)
+    for s in symptoms:
+        key = normalize_name(s)
+        if key in lower_map:
+            sample.at[0, lower_map[key]] = 1
+        else:
+            suggestions = difflib.get_close_matches(key, lower_names, n=1, cutoff=0.7)
+            if suggestions:
+                sample.at[0, lower_map[suggestions[0]]] = 1
+    proba = model.predict_proba(sample)
+    return model.classes[int(np.argmax(proba[0]))]
+
+
+def vectorized_predict(symptoms):
+    indices, _, _ = model.resolve_symptoms(symptoms)
+    return model.classes[int(np.argmax(model.predict_proba_indices(indices)))]
+
+
+def load_requests(n):
+    """Build realistic symptom lists from the rows of Specialist.csv"""
+    df = pd.read_csv("../Specialist.csv")
+    symptom_cols = [c.strip() for c in df.columns[1:-1]]
+    rows = df.sample(n=n, replace=True, random_state=42).iloc[:, 1:-1].values
+    return [[symptom_cols[i] for i in np.flatnonzero(row)] or [symptom_cols[0]] for row in rows]
+
+
+def misspell(name, rng):
+    """Drop, swap or replace one character to simulate a typed symptom"""
+    chars = list(name)
+    i = rng.randrange(len(chars))
+    op = rng.choice(["drop", "swap", "replace"])
+    if op == "drop" and len(chars) > 1:
+        del chars[i]
+    elif op == "swap" and i + 1 < len(chars):
+        chars[i], chars[i + 1] = chars[i + 1], chars[i]
+    else:
+        chars[i] = rng.choice("abcdefghijklmnopqrstuvwxyz_")
+    return "".join(chars)
+
+
+def benchmark_matcher(n):
+    rng = random.Random(42)
+    tokens = [misspell(rng.choice(lower_names), rng) for _ in range(n)]
+    # Uncached index so every lookup pays the full matching cost
+    matcher = SymptomMatcher(model.feature_columns, cutoff=0.7, cache_size=0)
+
+    def difflib_match(token):
+        matches = difflib.get_close_matches(token, lower_names, n=1, cutoff=0.7)
+        return matches[0] if matches else None
+
+    mismatches = sum(difflib_match(t) != matcher.closest(t) for t in tokens)
+    print(f"Fuzzy matcher parity on {n} misspelled symptoms: {mismatches} mismatches")
+    print("-" * 70)
+    old_p50, old_p99 = run("difflib", difflib_match, tokens)
+    new_p50, new_p99 = run("SymptomMatcher", matcher.closest, tokens)
+    print("-" * 70)
+    print(f"Speedup: p50 {old_p50 / new_p50:.1f}x, p99 {old_p99 / new_p99:.1f}x")
+
+
+def run(name, fn, requests_, warmup=50):
+    for symptoms in requests_[:warmup]:
+        fn(symptoms)
+
+    timings = []
+    for symptoms in requests_:
+        start = time.perf_counter()
+        fn(symptoms)
+        timings.append((time.perf_counter() - start) * 1000)
+
+    timings = np.array(timings)
+    p50, p99 = np.percentile(timings, [50, 99])
+    print(f"{name:<22} p50 {p50:8.3f} ms   p99 {p99:8.3f} ms   mean {timings.mean():8.3f} ms")
+    return p50, p99
+
+
+if __name__ == "__main__":
+    n_requests = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    requests_ = load_requests(n_requests)
+
+    mismatches = sum(legacy_predict(s) != vectorized_predict(s) for s in requests_[:200])
+    print(f"Parity check on 200 requests: {mismatches} mismatches")
+    print()
+
+    print(f"Per-request latency over {n_requests} requests")
+    print("-" * 70)
+    legacy_p50, legacy_p99 = run("pandas DataFrame", legacy_predict, requests_)
+    new_p50, new_p99 = run("numpy index scatter", vectorized_predict, requests_)
+    print("-" * 70)
+    print(f"Speedup: p50 {legacy_p50 / new_p50:.1f}x, p99 {legacy_p99 / new_p99:.1f}x")
+    print()
+
+    benchmark_matcher(n_requests)
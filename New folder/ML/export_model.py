@@ -0,0 +1,110 @@
+"""
+Export the specialist model to a single native XGBoost artifact
+Converts xgb_specialist_model.joblib, label_encoder.joblib and
+feature_columns.joblib into one UBJSON booster file whose attributes carry the
+label classes, feature columns and a model version. flask_api.py loads this
+file (when present) in milliseconds and predicts through the raw booster.
+
+Usage:
+    python export_model.py [--output specialist_model.ubj] [--verify]
+
+--verify checks that the exported artifact gives the same probabilities and
+predictions as the joblib model on every row of Specialist.csv.
+"""
+import sys
+import io
+
+import argparse
+import hashlib
+import json
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+import warnings
+warnings.filterwarnings("ignore")
+
+from specialist_model import (
+    ARTIFACT_FORMAT, ATTR_CLASSES, ATTR_FEATURES, ATTR_FORMAT, ATTR_VERSION,
+    SpecialistModel,
+)
+
+MODEL_FILE = "xgb_specialist_model.joblib"
+LABEL_ENCODER_FILE = "label_encoder.joblib"
+FEATURES_FILE = "feature_columns.joblib"
+DATA_FILE = "../Specialist.csv"
+
+
+def export(output, model_file=MODEL_FILE, label_encoder_file=LABEL_ENCODER_FILE, features_file=FEATURES_FILE):
+    model = joblib.load(model_file)
+    label_encoder = joblib.load(label_encoder_file)
+    feature_columns = joblib.load(features_file)
+
+    booster = model.get_booster().copy()
+    n_classes = int(json.loads(booster.save_config())["learner"]["learner_model_param"]["num_class"])
+    if n_classes != len(label_encoder.classes_):
+        raise ValueError(f"Model has {n_classes} classes but the label encoder has {len(label_encoder.classes_)}")
+
+    # Version = hash of the booster itself, so re-exporting the same model
+    # keeps the same version
+    version = hashlib.sha256(bytes(booster.save_raw("ubj"))).hexdigest()[:12]
+
+    booster.set_attr(**{
+        ATTR_FORMAT: ARTIFACT_FORMAT,
+        ATTR_VERSION: version,
+        ATTR_CLASSES: json.dumps([str(c) for c in label_encoder.classes_]),
+        ATTR_FEATURES: json.dumps(list(feature_columns)),
+    })
+    booster.save_model(output)
+    print(f"✓ Exported model {version} to {output}")
+    print(f"  {len(feature_columns)} features, {n_classes} specialist classes")
+
+
+def verify(output, model_file=MODEL_FILE, label_encoder_file=LABEL_ENCODER_FILE, features_file=FEATURES_FILE,
+           data_file=DATA_FILE):
+    """Parity of the artifact with the joblib model on Specialist.csv"""
+    df = pd.read_csv(data_file)
+    joblib_model = SpecialistModel.from_joblib(model_file, label_encoder_file, features_file)
+
+    start = time.perf_counter()
+    artifact_model = SpecialistModel.from_artifact(output)
+    load_ms = (time.perf_counter() - start) * 1000
+
+    # Every column except the target, in the same order as feature_columns
+    X = df.iloc[:, :-1].to_numpy(dtype=np.float32)
+    if X.shape[1] != artifact_model.n_features:
+        raise ValueError(f"Specialist.csv has {X.shape[1]} feature columns, model expects {artifact_model.n_features}")
+
+    expected = joblib_model.predict_proba(X)
+    actual = artifact_model.predict_proba(X)
+
+    max_diff = float(np.abs(expected - actual).max())
+    same_labels = int((expected.argmax(axis=1) == actual.argmax(axis=1)).sum())
+    same_classes = list(joblib_model.classes) == list(artifact_model.classes)
+
+    print(f"✓ Artifact loaded in {load_ms:.1f} ms")
+    print(f"  Rows compared: {len(X)}")
+    print(f"  Same predicted specialist: {same_labels}/{len(X)}")
+    print(f"  Max probability difference: {max_diff:.2e}")
+    print(f"  Same class labels: {same_classes}")
+
+    return same_classes and same_labels == len(X) and max_diff < 1e-5
+
+
+if __name__ == "__main__":
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+    parser = argparse.ArgumentParser(description="Export the specialist model to a native XGBoost artifact")
+    parser.add_argument("--output", default="specialist_model.ubj")
+    parser.add_argument("--verify", action="store_true", help="check parity with the joblib model on Specialist.csv")
+    args = parser.parse_args()
+
+    export(args.output)
+
+    if args.verify:
+        if verify(args.output):
+            print("✓ Artifact matches the joblib model")
+        else:
+            print("✗ Artifact does not match the joblib model")
+            sys.exit(1)
@@ -1,8 +1,13 @@
 from flask import Flask, request, jsonify
-import joblib
-import pandas as pd
-import difflib
+import numpy as np
+import hmac
+import os
+import threading
 import warnings
+from micro_batcher import MicroBatcher
+from model_reloader import ModelReloader, file_signatures
+from prediction_cache import PredictionCache
+from specialist_model import load_specialist_model, parse_top_k, top_specialists
 
 warnings.filterwarnings("ignore")
 
@@ -11,67 +16,262 @@ MODEL_FILE = "xgb_specialist_model.joblib"
 LABEL_ENCODER_FILE = "label_encoder.joblib"
 FEATURES_FILE = "feature_columns.joblib"
 
+# Native booster + metadata written by export_model.py; used instead of the
+# three joblib files above whenever it exists
+ARTIFACT_FILE = os.environ.get("ML_MODEL_ARTIFACT", "specialist_model.ubj")
+
+# Upper bound on the number of symptom lists accepted by /predict/batch
+MAX_BATCH_SIZE = int(os.environ.get("ML_MAX_BATCH_SIZE", 256))
+
+# Optional micro-batching of concurrent /predict calls (off by default)
+MICROBATCH_ENABLED = os.environ.get("ML_MICROBATCH", "0") == "1"
+MICROBATCH_WINDOW_MS = float(os.environ.get("ML_MICROBATCH_WINDOW_MS", 3))
+MICROBATCH_MAX_SIZE = int(os.environ.get("ML_MICROBATCH_MAX_SIZE", 32))
+
+# Cache of model outputs per recognized symptom set (ML_CACHE_SIZE=0 disables it)
+CACHE_SIZE = int(os.environ.get("ML_CACHE_SIZE", 4096))
+CACHE_TTL = float(os.environ.get("ML_CACHE_TTL", 3600))
+
+# Threads XGBoost may use per prediction; serve.py pins this to avoid
+# oversubscribing cores when several workers run side by side
+MODEL_NTHREAD = os.environ.get("ML_MODEL_NTHREAD")
+
+# Shared secret for POST /admin/reload (reloading over HTTP is disabled when unset)
+ADMIN_TOKEN = os.environ.get("ML_ADMIN_TOKEN")
+
+# Optional reload whenever one of the model files changes on disk
+WATCH_MODEL = os.environ.get("ML_WATCH_MODEL", "0") == "1"
+WATCH_INTERVAL = float(os.environ.get("ML_WATCH_INTERVAL", 5))
+WATCH_FILES = [ARTIFACT_FILE, MODEL_FILE, LABEL_ENCODER_FILE, FEATURES_FILE] if WATCH_MODEL else []
+
+def load_model():
+    return load_specialist_model(
+        ARTIFACT_FILE, MODEL_FILE, LABEL_ENCODER_FILE, FEATURES_FILE, nthread=MODEL_NTHREAD
+    )
+
+# Baseline for the file watcher, taken before loading so a file written
+# during the load is still picked up
+loaded_signatures = file_signatures(WATCH_FILES)
 try:
-    model = joblib.load(MODEL_FILE)
-    label_encoder = joblib.load(LABEL_ENCODER_FILE)
-    feature_columns = joblib.load(FEATURES_FILE)
+    specialist_model = load_model()
 except Exception as e:
     print(f"Failed to load: {e}")
     raise
 
-def normalize_name(name):
-    return name.strip().lower().replace(" ", "_").replace("-", "_")
+print(f"Loaded specialist model {specialist_model.version} from {specialist_model.source}")
+
+# Request handlers read specialist_model once and use only that object, so a
+# reload swapping it never mixes two models within one request
+_swap_lock = threading.Lock()
+
+def swap_model(new_model):
+    """Install a loaded and validated model for all following requests"""
+    global specialist_model
+
+    with _swap_lock:
+        old_version = specialist_model.version
+        specialist_model = new_model
+
+    prediction_cache.clear()
+    print(f"Swapped specialist model {old_version} -> {new_model.version} from {new_model.source}")
+
+def predict_model_batch(items):
+    """Micro-batch function: items are (model, indices) pairs, one model call per model"""
+    results = [None] * len(items)
+    groups = {}
+    for i, (model, indices) in enumerate(items):
+        groups.setdefault(id(model), (model, []))[1].append(i)
 
-feature_map = {c: c for c in feature_columns}
-feature_lower_map = {normalize_name(c): c for c in feature_columns}
-feature_list_lower = list(feature_lower_map.keys())
+    for model, positions in groups.values():
+        probas = model.predict_batch_proba([items[i][1] for i in positions])
+        for i, proba in zip(positions, probas):
+            results[i] = proba
+    return results
+
+batcher = None
+if MICROBATCH_ENABLED:
+    batcher = MicroBatcher(
+        predict_model_batch,
+        window_ms=MICROBATCH_WINDOW_MS,
+        max_batch_size=MICROBATCH_MAX_SIZE
+    )
+
+# Keys carry the model version, so results of a replaced model are never
+# served whichever path it was loaded from; swap_model also empties the cache
+prediction_cache = PredictionCache(max_size=CACHE_SIZE, ttl=CACHE_TTL)
+
+def cache_key(model, indices):
+    return (model.version, PredictionCache.make_key(indices))
+
+def cached_predict_proba(model, indices):
+    """Class probabilities for one request, served from the cache when possible"""
+    key = cache_key(model, indices)
+    proba = prediction_cache.get(key)
+    if proba is None:
+        if batcher is not None:
+            proba = batcher.submit((model, indices))
+        else:
+            proba = model.predict_proba_indices(indices)
+        prediction_cache.put(key, proba)
+    return proba
+
+reloader = ModelReloader(
+    load_model,
+    swap_model,
+    watch_files=WATCH_FILES,
+    watch_interval=WATCH_INTERVAL,
+    loaded_signatures=loaded_signatures
+)
 
 from flask_cors import CORS
 app = Flask(__name__)
 CORS(app)
 
+@app.before_request
+def start_model_watcher():
+    # Started from the first request rather than at import, so every forked
+    # server worker runs its own watcher
+    reloader.ensure_watcher()
+
 @app.route("/", methods=["GET"])
 def home():
-    return jsonify({"message": "Specialist Prediction API running!"})
+    return jsonify({
+        "message": "Specialist Prediction API running!",
+        "model_version": specialist_model.version
+    })
 
 @app.route("/predict", methods=["POST"])
 def predict():
     data = request.get_json(force=True)
+    if not isinstance(data, dict):
+        return jsonify({"error": "Request body must be a JSON object"}), 400
     symptoms = data.get("symptoms", [])
 
     if not isinstance(symptoms, list) or len(symptoms) == 0:
         return jsonify({"error": "Please provide a list of symptoms"}), 400
 
-    sample = pd.DataFrame([[0]*len(feature_columns)], columns=feature_columns)
-    recognized = []
-    unrecognized = []
-
-    for s in symptoms:
-        key = normalize_name(s)
-        if key in feature_lower_map:
-            col = feature_lower_map[key]
-            sample.at[0, col] = 1
-            recognized.append(col)
-        else:
-            suggestions = difflib.get_close_matches(key, feature_list_lower, n=1, cutoff=0.7)
-            if suggestions:
-                col = feature_lower_map[suggestions[0]]
-                sample.at[0, col] = 1
-                recognized.append(col)
-            else:
-                unrecognized.append(s)
+    model = specialist_model
+    indices, recognized, unrecognized = model.resolve_symptoms(symptoms)
 
     if not recognized:
         return jsonify({"error": "No valid symptoms recognized"}), 400
 
-    pred = model.predict(sample)
-    pred_label = label_encoder.inverse_transform(pred)[0]
+    try:
+        top_k = parse_top_k(model, data)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
-    return jsonify({
-        "predicted_specialist": pred_label,
+    proba = cached_predict_proba(model, indices)
+
+    result = {
+        "predicted_specialist": model.classes[int(np.argmax(proba))],
         "recognized_symptoms": recognized,
-        "unrecognized_symptoms": unrecognized
+        "unrecognized_symptoms": unrecognized,
+        "model_version": model.version
+    }
+    if top_k is not None:
+        result["top_specialists"] = top_specialists(model, proba, top_k)
+
+    return jsonify(result)
+
+@app.route("/predict/batch", methods=["POST"])
+def predict_batch():
+    """
+    Predict specialists for many symptom lists in a single model call
+
+    Request body:
+        {"batch": [["chills", "vomiting"], ["itching", "skin_rash"]], "top_k": 3}
+
+    Items without any recognized symptom get an "error" entry instead of a
+    prediction; the remaining items are still predicted.
+    """
+    data = request.get_json(force=True)
+    if not isinstance(data, dict):
+        return jsonify({"error": "Request body must be a JSON object"}), 400
+    batch = data.get("batch", [])
+
+    if not isinstance(batch, list) or len(batch) == 0:
+        return jsonify({"error": "Please provide a list of symptom lists"}), 400
+
+    if len(batch) > MAX_BATCH_SIZE:
+        return jsonify({"error": f"Batch size exceeds the maximum of {MAX_BATCH_SIZE}"}), 413
+
+    model = specialist_model
+    try:
+        top_k = parse_top_k(model, data)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    results = []
+    batch_indices = []
+    predicted_items = []
+
+    for symptoms in batch:
+        if not isinstance(symptoms, list) or len(symptoms) == 0:
+            results.append({"error": "Please provide a list of symptoms"})
+            continue
+
+        indices, recognized, unrecognized = model.resolve_symptoms(symptoms)
+        item = {
+            "recognized_symptoms": recognized,
+            "unrecognized_symptoms": unrecognized
+        }
+        if recognized:
+            batch_indices.append(indices)
+            predicted_items.append(item)
+        else:
+            item["error"] = "No valid symptoms recognized"
+        results.append(item)
+
+    if batch_indices:
+        keys = [cache_key(model, indices) for indices in batch_indices]
+        probas = [prediction_cache.get(key) for key in keys]
+
+        # Only the cache misses go through the model, still as one batch
+        missing = [i for i, proba in enumerate(probas) if proba is None]
+        if missing:
+            computed = model.predict_batch_proba([batch_indices[i] for i in missing])
+            for i, proba in zip(missing, computed):
+                probas[i] = proba
+                prediction_cache.put(keys[i], proba)
+
+        for item, proba in zip(predicted_items, probas):
+            item["predicted_specialist"] = model.classes[int(np.argmax(proba))]
+            if top_k is not None:
+                item["top_specialists"] = top_specialists(model, proba, top_k)
+
+    return jsonify({"results": results, "count": len(results), "model_version": model.version})
+
+@app.route("/stats", methods=["GET"])
+def stats():
+    return jsonify({
+        "micro_batching": batcher.stats() if batcher is not None else {"enabled": False},
+        "prediction_cache": prediction_cache.stats(),
+        "model_reload": reloader.stats()
     })
 
+@app.route("/admin/reload", methods=["GET", "POST"])
+def admin_reload():
+    """
+    Reload the model files in the background without pausing serving
+
+    POST starts a reload and returns 202 right away; GET returns the state of
+    the last reload. Both require the X-Admin-Token header to match
+    ML_ADMIN_TOKEN. Under gunicorn this reaches only the worker handling the
+    request - use ML_WATCH_MODEL=1 to reload every worker when files change.
+    """
+    if not ADMIN_TOKEN:
+        return jsonify({"error": "Model reload is disabled (ML_ADMIN_TOKEN is not set)"}), 403
+    if not hmac.compare_digest(request.headers.get("X-Admin-Token", ""), ADMIN_TOKEN):
+        return jsonify({"error": "Invalid admin token"}), 403
+
+    if request.method == "GET":
+        return jsonify(dict(reloader.stats(), model_version=specialist_model.version))
+
+    if not reloader.trigger(reason="admin"):
+        return jsonify({"error": "A reload is already in progress"}), 409
+
+    return jsonify({"message": "Model reload started", "model_version": specialist_model.version}), 202
+
 if __name__ == "__main__":
     app.run(debug=True, host="0.0.0.0", port=5174)
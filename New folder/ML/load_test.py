@@ -0,0 +1,117 @@
+"""
+Load Test for the Specialist Prediction API
+Measures /predict throughput and latency, either against a running server or
+by starting serve.py once per worker count to show how throughput scales.
+
+Usage:
+    # against an already running server
+    python load_test.py --url http://127.0.0.1:5174
+
+    # start serve.py with 1, 2 and 4 workers in turn
+    python load_test.py --workers 1,2,4 --concurrency 32
+"""
+import sys
+import io
+sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+import argparse
+import os
+import subprocess
+import time
+from multiprocessing import Pool
+
+import numpy as np
+import pandas as pd
+import requests
+
+
+def load_payloads(n):
+    """Symptom lists taken from the rows of Specialist.csv"""
+    df = pd.read_csv("../Specialist.csv")
+    symptom_cols = [c.strip() for c in df.columns[1:-1]]
+    rows = df.sample(n=n, replace=True, random_state=7).iloc[:, 1:-1].values
+    return [[symptom_cols[i] for i in np.flatnonzero(row)] or [symptom_cols[0]] for row in rows]
+
+
+def client(args):
+    """One client process: sends its share of requests over a keep-alive session"""
+    url, payloads = args
+    session = requests.Session()
+    timings = []
+    errors = 0
+    for symptoms in payloads:
+        start = time.perf_counter()
+        try:
+            response = session.post(f"{url}/predict", json={"symptoms": symptoms}, timeout=10)
+            if response.status_code != 200:
+                errors += 1
+        except requests.RequestException:
+            errors += 1
+        timings.append(time.perf_counter() - start)
+    return timings, errors
+
+
+def run_load(url, n_requests, concurrency):
+    payloads = load_payloads(n_requests)
+    shares = [(url, payloads[i::concurrency]) for i in range(concurrency)]
+
+    start = time.perf_counter()
+    with Pool(concurrency) as pool:
+        results = pool.map(client, shares)
+    elapsed = time.perf_counter() - start
+
+    timings = np.array([t for timings, _ in results for t in timings]) * 1000
+    errors = sum(e for _, e in results)
+    p50, p99 = np.percentile(timings, [50, 99])
+    return n_requests / elapsed, p50, p99, errors
+
+
+def wait_until_up(url, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if requests.get(url, timeout=1).status_code == 200:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.5)
+    raise RuntimeError(f"Server at {url} did not start within {timeout}s")
+
+
+def report(label, throughput, p50, p99, errors):
+    print(f"{label:<12} {throughput:10.1f} req/s   p50 {p50:7.2f} ms   p99 {p99:7.2f} ms   errors {errors}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test the /predict endpoint")
+    parser.add_argument("--url", default="http://127.0.0.1:5174")
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--workers", help="comma separated worker counts; starts serve.py for each")
+    parser.add_argument("--port", type=int, default=5190, help="port used for servers started by --workers")
+    args = parser.parse_args()
+
+    print(f"{args.requests} requests, {args.concurrency} concurrent clients")
+    print("-" * 70)
+
+    if not args.workers:
+        report(args.url, *run_load(args.url, args.requests, args.concurrency))
+        sys.exit(0)
+
+    url = f"http://127.0.0.1:{args.port}"
+    for workers in [int(w) for w in args.workers.split(",")]:
+        env = dict(
+            os.environ,
+            ML_PORT=str(args.port),
+            ML_WORKERS=str(workers),
+            # Every request must reach the model, not the prediction cache
+            ML_CACHE_SIZE="0",
+        )
+        server = subprocess.Popen([sys.executable, "serve.py"], env=env,
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            wait_until_up(url)
+            report(f"{workers} workers", *run_load(url, args.requests, args.concurrency))
+        finally:
+            server.terminate()
+            server.wait()
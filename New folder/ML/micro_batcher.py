@@ -0,0 +1,101 @@
+"""
+Micro-batching scheduler for the specialist prediction service
+Collects single predictions that arrive within a short time window and runs
+them through the model as one batch, then hands each caller its own result
+"""
+import os
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import Future
+
+
+class MicroBatcher:
+    """
+    Dynamic batching layer in front of a batch prediction function
+
+    predict_fn receives a list of items and must return one result per item,
+    in the same order. A batch is flushed as soon as max_batch_size items are
+    queued, or window_ms after the first item of the batch arrived.
+    """
+
+    def __init__(self, predict_fn, window_ms=3.0, max_batch_size=32):
+        self.predict_fn = predict_fn
+        self.window_ms = window_ms
+        self.max_batch_size = max_batch_size
+
+        self._pending = deque()
+        self._cond = threading.Condition()
+        self._worker = None
+        self._worker_pid = None
+
+        # Metrics on achieved batch sizes
+        self._batches = 0
+        self._items = 0
+        self._largest_batch = 0
+        self._size_histogram = Counter()
+
+    def submit(self, item):
+        """Queue one item and block until its batch has been predicted"""
+        future = Future()
+        with self._cond:
+            self._ensure_worker()
+            self._pending.append((item, future))
+            self._cond.notify()
+        return future.result()
+
+    def stats(self):
+        with self._cond:
+            return {
+                "enabled": True,
+                "window_ms": self.window_ms,
+                "max_batch_size": self.max_batch_size,
+                "batches": self._batches,
+                "items": self._items,
+                "avg_batch_size": round(self._items / self._batches, 2) if self._batches else 0.0,
+                "largest_batch": self._largest_batch,
+                "batch_size_histogram": {str(size): count for size, count in sorted(self._size_histogram.items())},
+                "queued": len(self._pending),
+            }
+
+    def _ensure_worker(self):
+        # Started lazily (and again after a fork) so that forked server
+        # workers each get their own scheduler thread
+        if self._worker is None or self._worker_pid != os.getpid():
+            self._worker_pid = os.getpid()
+            self._worker = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+            self._worker.start()
+
+    def _next_batch(self):
+        with self._cond:
+            while not self._pending:
+                self._cond.wait()
+
+            deadline = time.monotonic() + self.window_ms / 1000.0
+            while len(self._pending) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+
+            size = min(len(self._pending), self.max_batch_size)
+            batch = [self._pending.popleft() for _ in range(size)]
+
+            self._batches += 1
+            self._items += size
+            self._largest_batch = max(self._largest_batch, size)
+            self._size_histogram[size] += 1
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            try:
+                results = self.predict_fn([item for item, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
@@ -0,0 +1,164 @@
+"""
+Hot model reload for the specialist prediction service
+Loads a new model in a background thread, validates it against a smoke set
+and only then hands it to the service, so serving never pauses
+"""
+import os
+import threading
+import time
+import traceback
+
+import numpy as np
+
+# Symptom lists every candidate model must handle before it is swapped in
+SMOKE_SET = [
+    ["itching", "skin_rash", "nodal_skin_eruptions"],
+    ["chills", "vomiting", "high_fever", "abdominal_pain"],
+    ["cough", "chest_pain", "breathlessness"],
+    ["headache", "dizziness", "loss_of_balance"],
+    ["joint_pain", "swelling_joints", "movement_stiffness"],
+    ["continuous_sneezing", "runny_nose", "congestion"],
+]
+
+
+def smoke_test(specialist_model, smoke_set=SMOKE_SET):
+    """
+    Raise ValueError unless the model resolves and predicts every smoke item
+
+    Checks that each item has recognized symptoms and that the model returns
+    one probability per class, summing to 1.
+    """
+    specialist_model.validate()
+
+    batch_indices = []
+    for symptoms in smoke_set:
+        indices, recognized, _ = specialist_model.resolve_symptoms(symptoms)
+        if not recognized:
+            raise ValueError(f"Smoke item {symptoms} has no recognized symptoms")
+        batch_indices.append(indices)
+
+    probas = specialist_model.predict_batch_proba(batch_indices)
+    if probas.shape != (len(smoke_set), len(specialist_model.classes)):
+        raise ValueError(f"Unexpected smoke prediction shape {probas.shape}")
+    if not np.allclose(probas.sum(axis=1), 1.0, atol=1e-3):
+        raise ValueError("Smoke predictions are not probability distributions")
+
+
+def file_signatures(paths):
+    """(mtime, size) of every path, None for a missing file"""
+    signatures = []
+    for path in paths:
+        try:
+            st = os.stat(path)
+            signatures.append((st.st_mtime_ns, st.st_size))
+        except OSError:
+            signatures.append(None)
+    return signatures
+
+
+class ModelReloader:
+    """
+    Background reload of the served model
+
+    load_fn() builds a new model; after it passes smoke_test, on_swap(model)
+    installs it. Reloads run one at a time and never block requests. With
+    watch_files set, a watcher thread polls their size/mtime every
+    watch_interval seconds and reloads while they differ from the files the
+    served model was loaded from, so a change made during a reload (e.g. the
+    second file of a model written in two steps) triggers another one.
+
+    loaded_signatures are the file_signatures(watch_files) of the served
+    model, taken just before it was loaded (by default: now).
+    """
+
+    def __init__(self, load_fn, on_swap, watch_files=(), watch_interval=5.0, loaded_signatures=None):
+        self.load_fn = load_fn
+        self.on_swap = on_swap
+        self.watch_files = [f for f in watch_files if f]
+        self.watch_interval = watch_interval
+
+        self._lock = threading.Lock()
+        self._reloading = False
+        self._watcher = None
+        self._watcher_pid = None
+
+        if loaded_signatures is None:
+            loaded_signatures = file_signatures(self.watch_files)
+        self._loaded_signatures = loaded_signatures
+        # Files of the last failed reload, not retried until they change again
+        self._failed_signatures = None
+
+        self.status = {
+            "state": "idle",
+            "reloads": 0,
+            "failures": 0,
+            "last_started_at": None,
+            "last_finished_at": None,
+            "last_duration_ms": None,
+            "last_error": None,
+        }
+
+    def trigger(self, reason="manual"):
+        """Start a background reload; returns False if one is already running"""
+        with self._lock:
+            if self._reloading:
+                return False
+            self._reloading = True
+            self.status.update(state="reloading", reason=reason, last_started_at=time.time())
+
+        threading.Thread(target=self._reload, name="model-reload", daemon=True).start()
+        return True
+
+    def _reload(self):
+        start = time.perf_counter()
+        # Taken before loading: a file written during the load shows up as a
+        # difference at the next watcher poll
+        signatures = file_signatures(self.watch_files)
+        try:
+            new_model = self.load_fn()
+            smoke_test(new_model)
+            self.on_swap(new_model)
+        except Exception as e:
+            traceback.print_exc()
+            with self._lock:
+                self._failed_signatures = signatures
+                self.status.update(state="failed", last_error=str(e))
+                self.status["failures"] += 1
+        else:
+            with self._lock:
+                self._loaded_signatures = signatures
+                self._failed_signatures = None
+                self.status.update(state="idle", last_error=None, model_version=new_model.version)
+                self.status["reloads"] += 1
+        finally:
+            with self._lock:
+                self._reloading = False
+                self.status.update(
+                    last_finished_at=time.time(),
+                    last_duration_ms=round((time.perf_counter() - start) * 1000, 1),
+                )
+
+    def ensure_watcher(self):
+        """Start the file watcher in this process (again after a fork)"""
+        if not self.watch_files:
+            return
+        with self._lock:
+            if self._watcher is not None and self._watcher_pid == os.getpid():
+                return
+            self._watcher_pid = os.getpid()
+            self._watcher = threading.Thread(target=self._watch, name="model-watch", daemon=True)
+            self._watcher.start()
+
+    def _watch(self):
+        while True:
+            time.sleep(self.watch_interval)
+            current = file_signatures(self.watch_files)
+            with self._lock:
+                changed = current != self._loaded_signatures and current != self._failed_signatures
+            if changed:
+                # Refused while a reload runs; retried at the next poll
+                self.trigger(reason="file change")
+
+    def stats(self):
+        with self._lock:
+            return dict(self.status, watching=self.watch_files, watch_interval=self.watch_interval)
@@ -0,0 +1,81 @@
+"""
+Prediction result cache for the specialist prediction service
+Bounded LRU + TTL cache of class probabilities keyed by the canonical set of
+recognized feature columns
+"""
+import threading
+import time
+from collections import OrderedDict
+
+
+class PredictionCache:
+    """
+    LRU/TTL cache of model outputs
+
+    Keys are the sorted, de-duplicated feature indices of a request, so the
+    order of the symptoms and spelling variants resolving to the same column
+    share one entry. Callers that swap models put the model version in the key
+    (and clear() the cache on a swap), so a replaced model is never served.
+    """
+
+    def __init__(self, max_size=4096, ttl=3600):
+        self.max_size = max_size
+        self.ttl = ttl
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def make_key(indices):
+        return tuple(sorted(set(indices)))
+
+    def get(self, key):
+        if self.max_size <= 0:
+            return None
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[1] > self.ttl:
+                del self._entries[key]
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value):
+        if self.max_size <= 0:
+            return
+
+        with self._lock:
+            self._entries[key] = (value, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.invalidations += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.max_size > 0,
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "invalidations": self.invalidations,
+            }
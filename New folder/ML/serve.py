@@ -0,0 +1,88 @@
+"""
+Production server for the Specialist Prediction API
+Replaces the single-process debug server of `python flask_api.py`.
+
+On Linux/macOS the model is loaded once in a gunicorn master process, which
+then forks the workers; they share the loaded model copy-on-write. Where
+gunicorn is not available (Windows) a multi-threaded waitress server is used
+instead, with XGBoost allowed to use every core.
+
+Usage:
+    python serve.py
+
+Environment:
+    ML_HOST           bind address (default 0.0.0.0)
+    ML_PORT           port (default 5174)
+    ML_WORKERS        worker processes for gunicorn (default: number of cores)
+    ML_THREADS        threads per worker (default 4)
+    ML_MODEL_NTHREAD  XGBoost threads per prediction (default 1 with gunicorn,
+                      number of cores with waitress)
+"""
+import gc
+import os
+import sys
+
+HOST = os.environ.get("ML_HOST", "0.0.0.0")
+PORT = int(os.environ.get("ML_PORT", 5174))
+CPU_COUNT = os.cpu_count() or 1
+WORKERS = int(os.environ.get("ML_WORKERS", CPU_COUNT))
+THREADS = int(os.environ.get("ML_THREADS", 4))
+
+try:
+    from gunicorn.app.base import BaseApplication
+except ImportError:
+    BaseApplication = None
+
+
+def use_gunicorn():
+    return BaseApplication is not None and sys.platform != "win32"
+
+
+if use_gunicorn():
+    class PreloadedApplication(BaseApplication):
+        """gunicorn application serving an already imported WSGI app"""
+
+        def __init__(self, app, options):
+            self.application = app
+            self.options = options
+            super().__init__()
+
+        def load_config(self):
+            for key, value in self.options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return self.application
+
+
+def main():
+    # One XGBoost thread per worker by default so W workers use W cores
+    # instead of each of them trying to use all of them
+    os.environ.setdefault("ML_MODEL_NTHREAD", "1" if use_gunicorn() else str(CPU_COUNT))
+
+    # Loads the model, label encoder and feature index in this process
+    from flask_api import app
+
+    if use_gunicorn():
+        # Move everything loaded so far out of the garbage collector's reach,
+        # so collections in the workers don't touch (and copy) the shared pages
+        gc.freeze()
+
+        print(f"Serving on {HOST}:{PORT} with gunicorn: {WORKERS} workers x {THREADS} threads")
+        PreloadedApplication(app, {
+            "bind": f"{HOST}:{PORT}",
+            "workers": WORKERS,
+            "threads": THREADS,
+            "worker_class": "gthread",
+            "preload_app": True,
+            "timeout": 30,
+        }).run()
+    else:
+        from waitress import serve
+
+        print(f"Serving on {HOST}:{PORT} with waitress: {THREADS} threads")
+        serve(app, host=HOST, port=PORT, threads=THREADS)
+
+
+if __name__ == "__main__":
+    main()
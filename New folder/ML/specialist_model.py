@@ -0,0 +1,179 @@
+"""
+Specialist model loading for the prediction service
+Loads either the native XGBoost artifact written by export_model.py or the
+original joblib files, and exposes both through one prediction interface
+"""
+import hashlib
+import json
+import os
+import threading
+
+import numpy as np
+
+from symptom_matcher import SymptomMatcher
+
+# Booster attributes written by export_model.py
+ARTIFACT_FORMAT = "1"
+ATTR_FORMAT = "specialist_artifact_format"
+ATTR_VERSION = "specialist_model_version"
+ATTR_CLASSES = "specialist_classes"
+ATTR_FEATURES = "specialist_feature_columns"
+
+
+class SpecialistModel:
+    """
+    A loaded specialist model together with everything needed to serve it:
+    label classes, feature columns, the feature index map and the fuzzy
+    symptom matcher
+
+    predict_fn takes a float32 matrix of shape (n, n_features) and returns
+    class probabilities of shape (n, n_classes).
+    """
+
+    def __init__(self, predict_fn, classes, feature_columns, version, source):
+        self._predict_fn = predict_fn
+        self.classes = np.asarray(classes)
+        self.feature_columns = list(feature_columns)
+        self.version = version
+        self.source = source
+
+        # Column position of every feature, so encoding a request is an index
+        # scatter into a NumPy row instead of building a DataFrame per call
+        self.feature_index = {c: i for i, c in enumerate(self.feature_columns)}
+        self.n_features = len(self.feature_columns)
+
+        # Startup-time index replacing per-token difflib scans over every feature
+        self.matcher = SymptomMatcher(self.feature_columns, cutoff=0.7)
+
+        # One preallocated input row per serving thread (reset after every prediction)
+        self._row_buffers = threading.local()
+
+    @classmethod
+    def from_artifact(cls, path, nthread=None):
+        """Load the single-file native artifact and predict through the raw booster"""
+        import xgboost as xgb
+
+        booster = xgb.Booster()
+        booster.load_model(path)
+        if booster.attr(ATTR_FORMAT) != ARTIFACT_FORMAT:
+            raise ValueError(f"{path} is not a specialist model artifact (format {booster.attr(ATTR_FORMAT)})")
+        if nthread:
+            booster.set_param("nthread", int(nthread))
+
+        return cls(
+            predict_fn=lambda X: booster.inplace_predict(np.asarray(X, dtype=np.float32)),
+            classes=json.loads(booster.attr(ATTR_CLASSES)),
+            feature_columns=json.loads(booster.attr(ATTR_FEATURES)),
+            version=booster.attr(ATTR_VERSION),
+            source=path,
+        )
+
+    @classmethod
+    def from_joblib(cls, model_file, label_encoder_file, features_file, nthread=None):
+        """Load the pickled sklearn XGBClassifier, label encoder and feature list"""
+        import joblib
+
+        model = joblib.load(model_file)
+        label_encoder = joblib.load(label_encoder_file)
+        feature_columns = joblib.load(features_file)
+        if nthread:
+            model.set_params(n_jobs=int(nthread))
+
+        with open(model_file, "rb") as f:
+            version = hashlib.sha256(f.read()).hexdigest()[:12]
+
+        return cls(
+            predict_fn=model.predict_proba,
+            classes=label_encoder.classes_,
+            feature_columns=feature_columns,
+            version=version,
+            source=model_file,
+        )
+
+    def validate(self):
+        """Check that the model produces one probability per class for an empty row"""
+        proba = self.predict_proba(np.zeros((1, self.n_features), dtype=np.float32))
+        if proba.shape != (1, len(self.classes)):
+            raise ValueError(
+                f"Model output shape {proba.shape} does not match {len(self.classes)} classes"
+            )
+
+    def predict_proba(self, X):
+        return np.asarray(self._predict_fn(X))
+
+    def get_row_buffer(self):
+        row = getattr(self._row_buffers, "row", None)
+        if row is None:
+            row = np.zeros((1, self.n_features), dtype=np.float32)
+            self._row_buffers.row = row
+        return row
+
+    def resolve_symptoms(self, symptoms):
+        """
+        Map raw symptom names to model feature columns
+
+        Returns:
+            (indices, recognized, unrecognized) - indices are the column positions
+            of the recognized symptoms in feature_columns
+        """
+        indices = []
+        recognized = []
+        unrecognized = []
+
+        for s in symptoms:
+            col = self.matcher.resolve(s)
+            if col is None:
+                unrecognized.append(s)
+                continue
+
+            indices.append(self.feature_index[col])
+            recognized.append(col)
+
+        return indices, recognized, unrecognized
+
+    def predict_proba_indices(self, indices):
+        """Run the model on one encoded row and return its class probabilities"""
+        row = self.get_row_buffer()
+        row[0, indices] = 1
+        try:
+            proba = self.predict_proba(row)
+        finally:
+            row[0, indices] = 0
+        return proba[0]
+
+    def predict_batch_proba(self, batch_indices):
+        """Encode many index lists into one matrix and run the model once"""
+        X = np.zeros((len(batch_indices), self.n_features), dtype=np.float32)
+        rows = np.repeat(np.arange(len(batch_indices)), [len(idx) for idx in batch_indices])
+        cols = [i for idx in batch_indices for i in idx]
+        X[rows, cols] = 1
+        return self.predict_proba(X)
+
+
+def top_specialists(specialist_model, proba, top_k):
+    """The top_k most probable specialists for one row of class probabilities"""
+    order = np.argsort(proba)[::-1][:top_k]
+    return [
+        {"specialist": str(specialist_model.classes[i]), "probability": round(float(proba[i]), 4)}
+        for i in order
+    ]
+
+
+def parse_top_k(specialist_model, data):
+    """Optional top_k from a request body (None when absent, capped to the class count)"""
+    top_k = data.get("top_k")
+    if top_k is None:
+        return None
+    if isinstance(top_k, bool) or not isinstance(top_k, int) or top_k < 1:
+        raise ValueError("top_k must be a positive integer")
+    return min(top_k, len(specialist_model.classes))
+
+
+def load_specialist_model(artifact_file, model_file, label_encoder_file, features_file, nthread=None):
+    """Prefer the native artifact when it exists, otherwise fall back to the joblib files"""
+    if artifact_file and os.path.exists(artifact_file):
+        specialist_model = SpecialistModel.from_artifact(artifact_file, nthread=nthread)
+    else:
+        specialist_model = SpecialistModel.from_joblib(model_file, label_encoder_file, features_file, nthread=nthread)
+    specialist_model.validate()
+    return specialist_model
@@ -0,0 +1,85 @@
+"""
+Fuzzy symptom matcher for the specialist prediction service
+Resolves free-text symptom names to model feature columns with the same
+result as difflib.get_close_matches(n=1), using an index built at startup
+"""
+import difflib
+from functools import lru_cache
+
+import numpy as np
+
+
+def normalize_name(name):
+    return name.strip().lower().replace(" ", "_").replace("-", "_")
+
+
+class SymptomMatcher:
+    """
+    Exact + fuzzy lookup of symptom names
+
+    difflib scores every feature with SequenceMatcher.ratio(). Here the
+    character counts of all features are kept in a matrix, so the quick_ratio()
+    upper bound of every feature is one vectorized NumPy expression. Only the
+    features whose bound can still beat the best match so far are scored with
+    SequenceMatcher, highest bound first. The result (including the cutoff and
+    tie-breaking) is the same as difflib.get_close_matches(key, names, n=1).
+    """
+
+    def __init__(self, feature_columns, cutoff=0.7, cache_size=4096):
+        self.cutoff = cutoff
+        self.lower_map = {normalize_name(c): c for c in feature_columns}
+        self.names = list(self.lower_map.keys())
+
+        alphabet = sorted({ch for name in self.names for ch in name})
+        self._char_index = {ch: i for i, ch in enumerate(alphabet)}
+        self._char_counts = np.zeros((len(self.names), len(alphabet)), dtype=np.int32)
+        for row, name in enumerate(self.names):
+            for ch in name:
+                self._char_counts[row, self._char_index[ch]] += 1
+        self._lengths = np.array([len(name) for name in self.names], dtype=np.float64)
+
+        # Raw token -> resolved feature column (or None), for repeated inputs
+        self.resolve = lru_cache(maxsize=cache_size)(self._resolve)
+
+    def _resolve(self, symptom):
+        key = normalize_name(symptom)
+        col = self.lower_map.get(key)
+        if col is None:
+            match = self.closest(key)
+            if match is not None:
+                col = self.lower_map[match]
+        return col
+
+    def closest(self, key):
+        """Best normalized feature name for key, or None below the cutoff"""
+        if not key or not self.names:
+            return None
+
+        query_counts = np.zeros(len(self._char_index), dtype=np.int32)
+        for ch in key:
+            i = self._char_index.get(ch)
+            if i is not None:
+                query_counts[i] += 1
+
+        # quick_ratio() of every feature: 2 * shared characters / total length
+        shared = np.minimum(self._char_counts, query_counts).sum(axis=1)
+        bounds = 2.0 * shared / (self._lengths + len(key))
+
+        candidates = np.flatnonzero(bounds >= self.cutoff)
+        if len(candidates) == 0:
+            return None
+        candidates = candidates[np.argsort(-bounds[candidates], kind="stable")]
+
+        matcher = difflib.SequenceMatcher()
+        matcher.set_seq2(key)
+        best_score, best_name = -1.0, None
+        for i in candidates:
+            if bounds[i] < best_score:
+                break
+            name = self.names[i]
+            matcher.set_seq1(name)
+            score = matcher.ratio()
+            if score >= self.cutoff and (score, name) > (best_score, best_name or ""):
+                best_score, best_name = score, name
+
+        return best_name
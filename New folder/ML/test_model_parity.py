@@ -0,0 +1,71 @@
+"""
+Model Artifact Parity Test
+Exports the joblib specialist model to a native artifact in a temporary
+folder and checks that:
+
+- load_specialist_model uses the artifact when it exists, and the joblib
+  files otherwise
+- the artifact gives the same probabilities and predictions as the joblib
+  model on every row of Specialist.csv (export_model.verify)
+
+Skipped when xgb_specialist_model.joblib is not in ML_MODEL_DIR (default:
+this folder).
+
+Run from this folder:
+    python test_model_parity.py
+"""
+import os
+import shutil
+import tempfile
+import unittest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+MODEL_DIR = os.environ.get("ML_MODEL_DIR", HERE)
+DATA_FILE = os.path.join(HERE, "..", "Specialist.csv")
+
+MODEL_FILE = os.path.join(MODEL_DIR, "xgb_specialist_model.joblib")
+LABEL_ENCODER_FILE = os.path.join(MODEL_DIR, "label_encoder.joblib")
+FEATURES_FILE = os.path.join(MODEL_DIR, "feature_columns.joblib")
+
+
+@unittest.skipUnless(os.path.exists(MODEL_FILE), f"{MODEL_FILE} not found")
+class ArtifactParityTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        import export_model
+
+        cls.export_model = export_model
+        cls.tmp_dir = tempfile.mkdtemp()
+        cls.artifact_file = os.path.join(cls.tmp_dir, "specialist_model.ubj")
+        export_model.export(cls.artifact_file, MODEL_FILE, LABEL_ENCODER_FILE, FEATURES_FILE)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.tmp_dir, ignore_errors=True)
+
+    def load(self, artifact_file):
+        from specialist_model import load_specialist_model
+        return load_specialist_model(artifact_file, MODEL_FILE, LABEL_ENCODER_FILE, FEATURES_FILE)
+
+    def test_loader_prefers_artifact(self):
+        self.assertEqual(self.load(self.artifact_file).source, self.artifact_file)
+
+    def test_loader_falls_back_to_joblib(self):
+        missing = os.path.join(self.tmp_dir, "missing.ubj")
+        self.assertEqual(self.load(missing).source, MODEL_FILE)
+        self.assertEqual(self.load(None).source, MODEL_FILE)
+
+    def test_same_classes_and_features(self):
+        artifact, joblib_model = self.load(self.artifact_file), self.load(None)
+        self.assertEqual(list(artifact.classes), list(joblib_model.classes))
+        self.assertEqual(artifact.feature_columns, joblib_model.feature_columns)
+
+    def test_same_predictions(self):
+        self.assertTrue(self.export_model.verify(
+            self.artifact_file, MODEL_FILE, LABEL_ENCODER_FILE, FEATURES_FILE, DATA_FILE
+        ))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Doctor, Patient, Appointment, Feedback, MedicalDocument, Symptom, Specialty, FavoriteDoctor
+from .models import Doctor, Patient, Appointment, Feedback, MedicalDocument, Symptom, SymptomPrediction, Specialty, FavoriteDoctor, RankingWeightProfile
 
 
 @admin.register(Doctor)
@@ -31,6 +31,15 @@ class FeedbackAdmin(admin.ModelAdmin):
     search_fields = ('doctor__first_name', 'doctor__last_name', 'patient__first_name', 'patient__last_name')
 
 
+@admin.register(RankingWeightProfile)
+class RankingWeightProfileAdmin(admin.ModelAdmin):
+    list_display = ('name', 'rating', 'experience', 'feedback_count', 'sentiment', 'specialty_match',
+                    'is_default', 'cohort_share', 'is_active', 'version', 'updated_at')
+    list_filter = ('is_default', 'is_active')
+    search_fields = ('name', 'description')
+    readonly_fields = ('version', 'created_at', 'updated_at')
+
+
 @admin.register(MedicalDocument)
 class MedicalDocumentAdmin(admin.ModelAdmin):
     list_display = ('document_name', 'patient', 'category', 'uploaded_at')
@@ -44,6 +53,13 @@ class SymptomAdmin(admin.ModelAdmin):
     list_filter = ('severity', 'body_part', 'submitted_at')
     search_fields = ('patient__first_name', 'patient__last_name', 'symptom_description')
 
+
+@admin.register(SymptomPrediction)
+class SymptomPredictionAdmin(admin.ModelAdmin):
+    list_display = ('predicted_specialist', 'patient', 'model_version', 'top_k', 'created_at')
+    list_filter = ('predicted_specialist', 'model_version', 'created_at')
+    search_fields = ('patient__first_name', 'patient__last_name', 'predicted_specialist')
+
 @admin.register(Specialty)
 class SpecialtyAdmin(admin.ModelAdmin):
     list_display = ('name', 'approval_status', 'is_predefined', 'requested_by', 'approved_by', 'created_at')
@@ -0,0 +1,111 @@
+"""
+Circuit Breaker
+Stops calling a failing downstream service for a while instead of letting
+every request wait for it to time out
+"""
+import threading
+import time
+from collections import Counter
+
+
+class CircuitBreaker:
+    """
+    Classic closed / open / half-open circuit breaker
+
+    - closed: calls go through; failure_threshold consecutive failures open
+      the circuit
+    - open: calls are refused (allow() returns False) for reset_timeout
+      seconds
+    - half_open: a single trial call is let through; its success closes the
+      circuit again, its failure re-opens it
+
+    Every state change is counted in the transition metrics.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+
+        self._transitions = Counter()
+        self._short_circuited = 0
+        self._successes = 0
+        self._failures = 0
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._current_state()
+
+    def allow(self):
+        """Whether a call may go to the service now"""
+        with self._lock:
+            state = self._current_state()
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            self._short_circuited += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._successes += 1
+            self._consecutive_failures = 0
+            self._trial_in_flight = False
+            if self._current_state() != self.CLOSED:
+                self._transition(self.CLOSED)
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._consecutive_failures += 1
+            self._trial_in_flight = False
+            state = self._current_state()
+            if state == self.HALF_OPEN or (
+                state == self.CLOSED and self._consecutive_failures >= self.failure_threshold
+            ):
+                self._opened_at = time.monotonic()
+                self._transition(self.OPEN)
+
+    def abandon(self):
+        """
+        Give up a call allowed by allow() without an outcome (e.g. the request
+        was cancelled), so a half-open circuit can let its next trial through
+        """
+        with self._lock:
+            self._trial_in_flight = False
+
+    def stats(self):
+        with self._lock:
+            return {
+                'state': self._current_state(),
+                'failure_threshold': self.failure_threshold,
+                'reset_timeout_seconds': self.reset_timeout,
+                'consecutive_failures': self._consecutive_failures,
+                'successes': self._successes,
+                'failures': self._failures,
+                'short_circuited': self._short_circuited,
+                'transitions': dict(self._transitions),
+            }
+
+    def _current_state(self):
+        # Caller holds self._lock; an open circuit turns half-open once
+        # reset_timeout has passed
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self._transition(self.HALF_OPEN)
+        return self._state
+
+    def _transition(self, new_state):
+        self._transitions[f'{self._state}->{new_state}'] += 1
+        self._state = new_state
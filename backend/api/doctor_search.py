@@ -0,0 +1,133 @@
+"""
+Doctor Search
+Ranked search over doctor name, specialty, email and phone for the admin and
+patient doctor listings, served by the PostgreSQL indexes of migration 0008:
+
+- full-text: a GIN index on the weighted search vector below. Every word of
+  the query matches by prefix, and results are ranked (names first, then
+  specialty, then contact details)
+- substring: GIN trigram (pg_trgm) indexes on UPPER(column), which serve the
+  icontains filters, so partial emails and phone numbers still match without
+  a sequential scan
+
+Migration 0008 skips pg_trgm and the trigram indexes on servers that do not
+provide the extension. Where they are missing, search is the plain icontains
+filter it was before: OR-ing it with the full-text match would force a
+sequential scan that computes every doctor's search vector. Once pg_trgm is
+installed, "python manage.py create_trigram_indexes" adds them; running
+processes notice within DOCTOR_SEARCH_INDEX_TTL seconds.
+"""
+import re
+import time
+
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import connections
+from django.db.models import FloatField, Q
+from django.db.models.functions import Cast
+
+# Columns matched by substring (each has a trigram index)
+SEARCH_FIELDS = ('first_name', 'last_name', 'email', 'specialty', 'phone')
+
+TRIGRAM_INDEX_NAMES = [f'doctor_{field}_trgm_idx' for field in SEARCH_FIELDS]
+
+# Database alias -> (whether the trigram indexes exist, time.monotonic() of the check)
+_trigram_indexes = {}
+
+
+def _existing_indexes(connection, names):
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT indexname FROM pg_indexes WHERE indexname = ANY(%s)', [names])
+        return {row[0] for row in cursor.fetchall()}
+
+
+def has_trigram_indexes(using='default'):
+    """
+    Whether the trigram index of every SEARCH_FIELDS column exists (re-checked
+    every DOCTOR_SEARCH_INDEX_TTL seconds)
+    """
+    cached = _trigram_indexes.get(using)
+    if cached is None or time.monotonic() - cached[1] >= settings.DOCTOR_SEARCH_INDEX_TTL:
+        present = len(_existing_indexes(connections[using], TRIGRAM_INDEX_NAMES)) == len(TRIGRAM_INDEX_NAMES)
+        cached = _trigram_indexes[using] = (present, time.monotonic())
+    return cached[0]
+
+
+def pg_trgm_available(using='default'):
+    """Whether the database server provides the pg_trgm extension"""
+    with connections[using].cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+        return cursor.fetchone() is not None
+
+
+def create_trigram_indexes(using='default'):
+    """
+    Install pg_trgm and add the missing trigram indexes of Doctor (those
+    migration 0008 skipped); returns the names of the indexes created
+    """
+    from api.models import Doctor
+
+    connection = connections[using]
+    existing = _existing_indexes(connection, TRIGRAM_INDEX_NAMES)
+    missing = [index for index in Doctor._meta.indexes
+               if index.name in TRIGRAM_INDEX_NAMES and index.name not in existing]
+    with connection.schema_editor() as schema_editor:
+        schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        for index in missing:
+            schema_editor.add_index(Doctor, index)
+    _trigram_indexes.pop(using, None)
+    return [index.name for index in missing]
+
+
+def doctor_search_vector():
+    """
+    Weighted full-text vector of a doctor; the GIN index on Doctor is built
+    from this same expression, so queries must use it unchanged
+    """
+    return (
+        SearchVector('first_name', 'last_name', weight='A', config='simple') +
+        SearchVector('specialty', weight='B', config='simple') +
+        SearchVector('email', 'phone', weight='C', config='simple')
+    )
+
+
+def prefix_search_query(text):
+    """tsquery matching every word of text as a prefix (None when text has no words)"""
+    words = re.findall(r'\w+', text.lower())
+    if not words:
+        return None
+    return SearchQuery(' & '.join(f'{word}:*' for word in words), search_type='raw', config='simple')
+
+
+def search_doctors(queryset, text):
+    """
+    Filter a Doctor queryset to the doctors matching text and order them by
+    relevance (search_rank annotation, highest first)
+
+    Matches are full-text word-prefix matches plus the substring matches of
+    the previous icontains search, so no earlier result is lost. Equal ranks
+    keep the queryset's own ordering. Without the trigram indexes this is the
+    icontains filter alone, in the queryset's ordering (no search_rank).
+    """
+    text = text.strip()
+    if not text:
+        return queryset
+
+    substring = Q()
+    for field in SEARCH_FIELDS:
+        substring |= Q(**{f'{field}__icontains': text})
+
+    search_query = prefix_search_query(text)
+    if search_query is None or not has_trigram_indexes(queryset.db):
+        return queryset.filter(substring)
+
+    vector = doctor_search_vector()
+    return (
+        queryset
+        .annotate(search_document=vector)
+        .filter(Q(search_document=search_query) | substring)
+        # double precision: ts_rank's real does not round-trip through
+        # Python floats, which keyset pagination cursors rely on
+        .annotate(search_rank=Cast(SearchRank(vector, search_query), FloatField()))
+        .order_by('-search_rank', *queryset.query.order_by, 'id')
+    )
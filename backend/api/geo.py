@@ -0,0 +1,112 @@
+"""
+Geo Search
+Nearby-doctor filter (?near=lat,lng&radius=km) over the coordinates of the
+doctors' active hospital locations, without PostGIS:
+
+- a bounding box around the point selects candidate locations with a range
+  scan of the (latitude, longitude) index
+- the haversine great-circle distance of the candidates is computed in SQL,
+  and each doctor gets the distance of its nearest location
+
+Both run inside the doctor query, so a filtered, distance-sorted listing is
+still a single query.
+"""
+import math
+
+from django.conf import settings
+from django.db.models import FloatField, OuterRef, Q, Subquery, Value
+from django.db.models.functions import ASin, Cast, Cos, Least, Power, Radians, Sin, Sqrt
+
+# Mean Earth radius
+EARTH_RADIUS_KM = 6371.0088
+
+
+def parse_near(near, radius=None):
+    """
+    Validate the near / radius request parameters
+
+    Returns:
+        (latitude, longitude, radius_km)
+
+    Raises:
+        ValueError: malformed or out-of-range values
+    """
+    try:
+        latitude, longitude = (float(value) for value in near.split(','))
+    except (AttributeError, ValueError):
+        raise ValueError('near must be "latitude,longitude"')
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        raise ValueError('near is out of range (latitude -90..90, longitude -180..180)')
+
+    if radius in (None, ''):
+        radius_km = settings.DOCTOR_NEAR_DEFAULT_RADIUS_KM
+    else:
+        try:
+            radius_km = float(radius)
+        except ValueError:
+            raise ValueError('radius must be a number of kilometres')
+        if not 0 < radius_km <= settings.DOCTOR_NEAR_MAX_RADIUS_KM:
+            raise ValueError(f'radius must be between 0 and {settings.DOCTOR_NEAR_MAX_RADIUS_KM} km')
+    return latitude, longitude, radius_km
+
+
+def bounding_box(latitude, longitude, radius_km):
+    """
+    Q matching every HospitalLocation within radius_km of the point (and a
+    few just outside, in the corners of the box)
+    """
+    lat_delta = math.degrees(radius_km / EARTH_RADIUS_KM)
+    min_lat, max_lat = latitude - lat_delta, latitude + lat_delta
+    box = Q(latitude__gte=max(min_lat, -90), latitude__lte=min(max_lat, 90))
+
+    if min_lat <= -90 or max_lat >= 90:
+        # The circle contains a pole: every longitude is in range
+        return box
+
+    ratio = math.sin(radius_km / EARTH_RADIUS_KM) / math.cos(math.radians(latitude))
+    lng_delta = math.degrees(math.asin(min(ratio, 1.0)))
+    min_lng, max_lng = longitude - lng_delta, longitude + lng_delta
+    if min_lng < -180:
+        # Crosses the antimeridian: two longitude ranges
+        return box & (Q(longitude__gte=min_lng + 360) | Q(longitude__lte=max_lng))
+    if max_lng > 180:
+        return box & (Q(longitude__gte=min_lng) | Q(longitude__lte=max_lng - 360))
+    return box & Q(longitude__gte=min_lng, longitude__lte=max_lng)
+
+
+def haversine_km(latitude, longitude):
+    """Distance in km between the point and a HospitalLocation row's coordinates"""
+    lat1, lng1 = math.radians(latitude), math.radians(longitude)
+    lat2 = Radians(Cast('latitude', FloatField()))
+    lng2 = Radians(Cast('longitude', FloatField()))
+
+    a = (
+        Power(Sin((lat2 - lat1) / 2), 2) +
+        math.cos(lat1) * Cos(lat2) * Power(Sin((lng2 - lng1) / 2), 2)
+    )
+    # LEAST guards asin against a rounding error just above 1
+    return 2 * EARTH_RADIUS_KM * ASin(Sqrt(Least(a, Value(1.0))))
+
+
+def filter_near(queryset, latitude, longitude, radius_km):
+    """
+    Restrict a Doctor queryset to doctors with an active hospital location
+    within radius_km, annotated with distance_km (to the nearest one)
+
+    The caller decides the ordering (e.g. order_by('distance_km', 'id')).
+    """
+    from api.models import HospitalLocation
+
+    nearby = (
+        HospitalLocation.objects
+        .filter(bounding_box(latitude, longitude, radius_km), is_active=True)
+        .annotate(distance_km=haversine_km(latitude, longitude))
+        .filter(distance_km__lte=radius_km)
+    )
+    nearest = nearby.filter(doctor=OuterRef('pk')).order_by('distance_km').values('distance_km')[:1]
+
+    return (
+        queryset
+        .filter(pk__in=nearby.values('doctor'))
+        .annotate(distance_km=Subquery(nearest, output_field=FloatField()))
+    )
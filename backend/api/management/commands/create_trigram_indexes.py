@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api.doctor_search import create_trigram_indexes, pg_trgm_available
+
+
+class Command(BaseCommand):
+    help = '''
+    Install pg_trgm and add the doctor search trigram indexes.
+
+    Migration 0008 skips them on PostgreSQL servers without the pg_trgm
+    extension; run this once the extension is available. Indexes that
+    already exist are left alone.
+    '''
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default', help='database alias to create the indexes in')
+
+    def handle(self, *args, **options):
+        if not pg_trgm_available(options['database']):
+            raise CommandError('pg_trgm is not available on this PostgreSQL server; install it (postgresql-contrib) first')
+        self.stdout.write(self.style.NOTICE('Creating doctor search trigram indexes...'))
+        created = create_trigram_indexes(options['database'])
+        if created:
+            self.stdout.write(self.style.SUCCESS(f'  Created {", ".join(created)}'))
+        else:
+            self.stdout.write(self.style.SUCCESS('  All trigram indexes already exist'))
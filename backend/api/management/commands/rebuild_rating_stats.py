@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from api.rating_stats import rebuild_rating_stats
+
+
+class Command(BaseCommand):
+    help = '''
+    Rebuild the per-doctor rating stats (DoctorRatingStats) from the Feedback table.
+
+    The stats are kept up to date by signals on every Feedback save/delete;
+    run this after bulk changes that bypass signals (QuerySet.update, raw SQL,
+    loaddata) or to repair drift.
+    '''
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.NOTICE('Rebuilding doctor rating stats...'))
+        doctors = rebuild_rating_stats()
+        self.stdout.write(self.style.SUCCESS(f'  Rating stats rebuilt for {doctors} doctors with feedback'))
@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.ranking_service import DoctorRankingService
+
+
+class Command(BaseCommand):
+    help = '''
+    Recompute the stored ranking score (Doctor.ranking_score) of every doctor.
+
+    Scores are refreshed automatically when feedback or a doctor's ranking
+    inputs change, and when the mean of all ratings used as the rating prior
+    moves past RANKING_PRIOR_REFRESH_TOLERANCE; run this periodically (or with
+    --interval as a background loop) to pick up anything changed outside the
+    ORM.
+    '''
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=float, default=0,
+            help='keep running and refresh every INTERVAL seconds'
+        )
+
+    def handle(self, *args, **options):
+        interval = options['interval']
+        while True:
+            start = time.perf_counter()
+            refreshed = DoctorRankingService.refresh_stored_scores()
+            elapsed = (time.perf_counter() - start) * 1000
+            self.stdout.write(self.style.SUCCESS(f'  Refreshed ranking scores of {refreshed} doctors in {elapsed:.0f} ms'))
+
+            if interval <= 0:
+                break
+            time.sleep(interval)
@@ -0,0 +1,38 @@
+# Generated by Django 4.2.7 on 2026-10-17 02:42
+
+import django.contrib.postgres.fields
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_remove_hospitallocation_latitude_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SymptomPrediction',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('symptoms', django.contrib.postgres.fields.ArrayField(base_field=models.TextField(), size=None)),
+                ('symptoms_key', models.CharField(help_text='SHA-256 of the normalized, sorted symptom list', max_length=64)),
+                ('top_k', models.IntegerField(blank=True, null=True)),
+                ('model_version', models.CharField(max_length=64)),
+                ('predicted_specialist', models.CharField(max_length=100)),
+                ('top_specialists', models.JSONField(blank=True, help_text='Specialists with probabilities, most probable first', null=True)),
+                ('recognized_symptoms', django.contrib.postgres.fields.ArrayField(base_field=models.TextField(), default=list, size=None)),
+                ('unrecognized_symptoms', django.contrib.postgres.fields.ArrayField(base_field=models.TextField(), default=list, size=None)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('patient', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='symptom_predictions', to='api.patient')),
+                ('symptom', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='predictions', to='api.symptom')),
+            ],
+            options={
+                'db_table': 'symptom_predictions',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['symptoms_key', 'model_version', 'top_k'], name='symptom_pred_lookup_idx')],
+            },
+        ),
+    ]
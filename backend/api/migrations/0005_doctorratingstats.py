@@ -0,0 +1,49 @@
+# Generated by Django 4.2.7 on 2026-10-17 02:44
+
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Avg, Count, Sum
+
+
+def populate_rating_stats(apps, schema_editor):
+    Feedback = apps.get_model('api', 'Feedback')
+    DoctorRatingStats = apps.get_model('api', 'DoctorRatingStats')
+
+    totals = (
+        Feedback.objects.order_by()
+        .values('doctor_id')
+        .annotate(rating_sum=Sum('rating'), rating_count=Count('id'), avg_rating=Avg('rating'))
+    )
+    DoctorRatingStats.objects.bulk_create([
+        DoctorRatingStats(
+            doctor_id=row['doctor_id'],
+            rating_sum=row['rating_sum'],
+            rating_count=row['rating_count'],
+            avg_rating=float(row['avg_rating']),
+        )
+        for row in totals
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_symptomprediction'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DoctorRatingStats',
+            fields=[
+                ('doctor', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='rating_stats', serialize=False, to='api.doctor')),
+                ('rating_sum', models.IntegerField(default=0)),
+                ('rating_count', models.IntegerField(default=0)),
+                ('avg_rating', models.FloatField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'doctor_rating_stats',
+            },
+        ),
+        migrations.RunPython(populate_rating_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.7 on 2026-10-17 02:46
+
+from django.db import migrations, models
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_doctorratingstats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='doctor',
+            name='ranking_components',
+            field=models.JSONField(blank=True, default=dict, help_text='Raw 0-100 score of each ranking component'),
+        ),
+        migrations.AddField(
+            model_name='doctor',
+            name='ranking_score',
+            field=models.FloatField(default=0.0),
+        ),
+        migrations.AddField(
+            model_name='doctor',
+            name='ranking_updated_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='doctor',
+            index=models.Index(django.db.models.functions.text.Upper('specialty'), models.F('approval_status'), models.F('is_blocked'), models.OrderBy(models.F('ranking_score'), descending=True), models.F('id'), name='doctor_specialty_ranking_idx'),
+        ),
+    ]
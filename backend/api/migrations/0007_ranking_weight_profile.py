@@ -0,0 +1,56 @@
+# Generated by Django 4.2.7 on 2026-10-17 02:52
+
+from django.db import migrations, models
+
+
+def create_weight_profiles(apps, schema_editor):
+    RankingWeightProfile = apps.get_model('api', 'RankingWeightProfile')
+
+    # DoctorRankingService.DEFAULT_WEIGHTS and FUTURE_WEIGHTS
+    RankingWeightProfile.objects.create(
+        name='default', description='Phase 1 weights',
+        rating=0.40, experience=0.30, feedback_count=0.20, sentiment=0.00, specialty_match=0.10,
+        is_default=True,
+    )
+    RankingWeightProfile.objects.create(
+        name='future', description='Phase 3 weights, with comment sentiment',
+        rating=0.30, experience=0.25, feedback_count=0.15, sentiment=0.20, specialty_match=0.10,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_doctor_ranking_score'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RankingWeightProfile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.SlugField(unique=True)),
+                ('description', models.CharField(blank=True, max_length=255)),
+                ('rating', models.FloatField(default=0.4)),
+                ('experience', models.FloatField(default=0.3)),
+                ('feedback_count', models.FloatField(default=0.2)),
+                ('sentiment', models.FloatField(default=0.0)),
+                ('specialty_match', models.FloatField(default=0.1)),
+                ('is_default', models.BooleanField(default=False, help_text='Used by requests that select no profile and are in no cohort')),
+                ('cohort_share', models.PositiveIntegerField(default=0, help_text='Relative share of patients assigned to this profile (0 = not in the A/B test)')),
+                ('is_active', models.BooleanField(default=True)),
+                ('version', models.PositiveIntegerField(default=1, editable=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'ranking_weight_profiles',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='rankingweightprofile',
+            constraint=models.UniqueConstraint(condition=models.Q(('is_default', True)), fields=('is_default',), name='single_default_ranking_profile'),
+        ),
+        migrations.RunPython(create_weight_profiles, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,88 @@
+# Generated by Django 4.2.7 on 2026-10-17 02:57
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.operations
+import django.contrib.postgres.search
+from django.db import migrations, models
+import django.db.models.functions.comparison
+import django.db.models.functions.text
+
+
+# pg_trgm is not shipped with every PostgreSQL server. Without it the
+# extension and the trigram indexes are skipped (the migration state still
+# has them) and api.doctor_search falls back to plain icontains filters;
+# "manage.py create_trigram_indexes" adds them once the extension exists.
+
+def _pg_trgm_available(schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+        return cursor.fetchone() is not None
+
+
+def _pg_trgm_installed(schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+        return cursor.fetchone() is not None
+
+
+def _index_exists(schema_editor, name):
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute('SELECT 1 FROM pg_indexes WHERE indexname = %s', [name])
+        return cursor.fetchone() is not None
+
+
+class TrigramExtensionIfAvailable(django.contrib.postgres.operations.TrigramExtension):
+    """TrigramExtension that is skipped when the server does not provide pg_trgm"""
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if not _pg_trgm_available(schema_editor):
+            print('\n  pg_trgm is not available: skipping it and the doctor trigram indexes', end='')
+            return
+        super().database_forwards(app_label, schema_editor, from_state, to_state)
+
+
+class AddTrigramIndex(migrations.AddIndex):
+    """AddIndex that does nothing in the database when pg_trgm is not installed"""
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if _pg_trgm_installed(schema_editor):
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if _index_exists(schema_editor, self.index.name):
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_ranking_weight_profile'),
+    ]
+
+    operations = [
+        TrigramExtensionIfAvailable(),
+        migrations.AddIndex(
+            model_name='doctor',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.search.CombinedSearchVector(django.contrib.postgres.search.CombinedSearchVector(django.contrib.postgres.search.SearchVector('first_name', 'last_name', config='simple', weight='A'), '||', django.contrib.postgres.search.SearchVector('specialty', config='simple', weight='B'), django.contrib.postgres.search.SearchConfig('simple')), '||', django.contrib.postgres.search.SearchVector('email', 'phone', config='simple', weight='C'), django.contrib.postgres.search.SearchConfig('simple')), name='doctor_search_vector_idx'),
+        ),
+        AddTrigramIndex(
+            model_name='doctor',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper(django.db.models.functions.comparison.Cast('first_name', output_field=models.TextField())), name='gin_trgm_ops'), name='doctor_first_name_trgm_idx'),
+        ),
+        AddTrigramIndex(
+            model_name='doctor',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper(django.db.models.functions.comparison.Cast('last_name', output_field=models.TextField())), name='gin_trgm_ops'), name='doctor_last_name_trgm_idx'),
+        ),
+        AddTrigramIndex(
+            model_name='doctor',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper(django.db.models.functions.comparison.Cast('email', output_field=models.TextField())), name='gin_trgm_ops'), name='doctor_email_trgm_idx'),
+        ),
+        AddTrigramIndex(
+            model_name='doctor',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper(django.db.models.functions.comparison.Cast('specialty', output_field=models.TextField())), name='gin_trgm_ops'), name='doctor_specialty_trgm_idx'),
+        ),
+        AddTrigramIndex(
+            model_name='doctor',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper(django.db.models.functions.comparison.Cast('phone', output_field=models.TextField())), name='gin_trgm_ops'), name='doctor_phone_trgm_idx'),
+        ),
+    ]
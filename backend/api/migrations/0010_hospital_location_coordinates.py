@@ -0,0 +1,27 @@
+# Generated by Django 4.2.7 on 2026-10-17 03:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='hospitallocation',
+            name='latitude',
+            field=models.DecimalField(blank=True, decimal_places=6, max_digits=9, null=True),
+        ),
+        migrations.AddField(
+            model_name='hospitallocation',
+            name='longitude',
+            field=models.DecimalField(blank=True, decimal_places=6, max_digits=9, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='hospitallocation',
+            index=models.Index(fields=['latitude', 'longitude'], name='hospital_location_coords_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-17 03:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_hospital_location_coordinates'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='doctor',
+            name='ranking_rating_prior',
+            field=models.FloatField(blank=True, help_text='Rating prior mean the stored score was computed with', null=True),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.7 on 2026-10-17 03:26
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_doctor_ranking_rating_prior'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='hospitallocation',
+            name='latitude',
+            field=models.DecimalField(blank=True, decimal_places=6, max_digits=9, null=True, validators=[django.core.validators.MinValueValidator(-90), django.core.validators.MaxValueValidator(90)]),
+        ),
+        migrations.AlterField(
+            model_name='hospitallocation',
+            name='longitude',
+            field=models.DecimalField(blank=True, decimal_places=6, max_digits=9, null=True, validators=[django.core.validators.MinValueValidator(-180), django.core.validators.MaxValueValidator(180)]),
+        ),
+        migrations.AddConstraint(
+            model_name='hospitallocation',
+            constraint=models.CheckConstraint(check=models.Q(('latitude__gte', -90), ('latitude__lte', 90)), name='hospital_location_latitude_range'),
+        ),
+        migrations.AddConstraint(
+            model_name='hospitallocation',
+            constraint=models.CheckConstraint(check=models.Q(('longitude__gte', -180), ('longitude__lte', 180)), name='hospital_location_longitude_range'),
+        ),
+    ]
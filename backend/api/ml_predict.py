@@ -1,14 +1,101 @@
 """
 ML Specialist Prediction Service
-Calls the Flask ML API to predict specialist based on symptoms
+Predicts the specialist for a list of symptoms with the configured predictor
+backend (Flask ML API over HTTP, or the model loaded in-process)
 """
-import requests
-from rest_framework.decorators import api_view
+import hashlib
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import JsonResponse
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.decorators import api_view, authentication_classes, permission_classes
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.permissions import IsAdminUser
 from rest_framework.response import Response
 from rest_framework import status
 
+from api.ml_predictors import PredictionError, get_predictor
+from api.ranking_weights import get_weight_profile
+
+
+def _rank_doctors_by_specialty(specialties, request, limit=None, profile=None):
+    """
+    Fetch and rank approved, non-blocked doctors for several specialties with
+    a weight profile (DoctorRankingService.rank_for_specialties; the stored
+    ranking score for the default profile)
+
+    Without limit all doctors come from one query. With limit only the
+    first page of each specialty is fetched (one query per specialty plus
+    one count query); the rest can be loaded page by page from
+    /doctors/by-specialty/ with the returned cursors.
+
+    Returns:
+        (ranked, next_cursors, totals): dicts keyed by specialty with the
+        serialized doctors (highest ranking score first), the cursor of the
+        next page (None when there is none) and the number of doctors
+    """
+    from django.db.models import Count, Q
+    from django.db.models.functions import Lower
+    from api.models import Doctor
+    from api.serializers import DoctorSerializer
+    from api.ranking_service import DoctorRankingService
+
+    specialty_filter = Q()
+    for specialty in specialties:
+        specialty_filter |= Q(specialty__iexact=specialty)
+
+    doctors = Doctor.objects.filter(
+        specialty_filter,
+        approval_status='approved',
+        is_blocked=False
+    )
+
+    next_cursors = {specialty: None for specialty in specialties}
+    if limit is None:
+        # Every doctor here matches one of the specialties, so it gets the
+        # score it has when ranked for its own specialty
+        ranked_doctors = DoctorRankingService.rank_for_specialties(
+            DoctorSerializer.prepare_queryset(doctors), specialties, profile
+        )
+
+        # Query results are already sorted by score, so each group stays sorted
+        doctors_by_specialty = {specialty.lower(): [] for specialty in specialties}
+        for doctor in ranked_doctors:
+            doctors_by_specialty.setdefault(doctor.specialty.lower(), []).append(doctor)
+        pages = {specialty: doctors_by_specialty[specialty.lower()] for specialty in specialties}
+        totals = {specialty: len(pages[specialty]) for specialty in specialties}
+    else:
+        counts = dict(
+            doctors.annotate(specialty_key=Lower('specialty'))
+            .values('specialty_key')
+            .annotate(total=Count('id'))
+            .values_list('specialty_key', 'total')
+        )
+        totals = {specialty: counts.get(specialty.lower(), 0) for specialty in specialties}
+
+        pages = {}
+        for specialty in specialties:
+            pages[specialty], next_cursors[specialty] = DoctorRankingService.paginate(
+                DoctorRankingService.rank_for_specialties(
+                    DoctorSerializer.prepare_queryset(doctors.filter(specialty__iexact=specialty)),
+                    [specialty],
+                    profile
+                ),
+                limit
+            )
 
-ML_API_URL = "http://127.0.0.1:5174/predict"
+    ranked = {}
+    for specialty in specialties:
+        serializer = DoctorSerializer(
+            pages[specialty],
+            many=True,
+            context={'request': request, 'predicted_specialty': specialty, 'weight_profile': profile}
+        )
+        ranked[specialty] = serializer.data
+
+    return ranked, next_cursors, totals
 
 
 @api_view(['POST'])
@@ -18,7 +105,11 @@ def predict_specialist(request):
 
     Request body:
     {
-        "symptoms": ["chills", "vomiting", "high_fever", "abdominal_pain"]
+        "symptoms": ["chills", "vomiting", "high_fever", "abdominal_pain"],
+        "top_k": 3,  (optional)
+        "limit": 20,  (optional)
+        "patient_id": "...",  (optional)
+        "weight_profile": "default"  (optional)
     }
 
     Response:
@@ -27,86 +118,328 @@ def predict_specialist(request):
         "recognized_symptoms": ["chills", "vomiting", "high_fever", "abdominal_pain"],
         "unrecognized_symptoms": []
     }
-    """
-    symptoms = request.data.get('symptoms', [])
 
-    if not symptoms or not isinstance(symptoms, list):
-        return Response({
-            'error': 'Please provide a list of symptoms'
-        }, status=status.HTTP_400_BAD_REQUEST)
+    With top_k the response also has "top_specialists" (specialist + probability,
+    most probable first) and "ranked_doctors_by_specialty" with the ranked
+    doctors of each of those specialties, all from a single ML call.
 
-    try:
-        # Call the ML Flask API
-        response = requests.post(
-            ML_API_URL,
-            json={'symptoms': symptoms},
-            timeout=30
-        )
+    With limit only the first `limit` ranked doctors of each specialty are
+    returned, plus "next_cursor" (and "next_cursor_by_specialty" with top_k)
+    for loading the following pages from
+    /doctors/by-specialty/?specialty=...&limit=...&cursor=...
+    "total_doctors_found" is always the full number of matching doctors.
 
-        if response.status_code == 200:
-            ml_response = response.json()
-            predicted_specialist = ml_response.get('predicted_specialist')
-
-            # Fetch and rank doctors by the predicted specialty
-            ranked_doctors = []
-            if predicted_specialist:
-                try:
-                    from api.models import Doctor
-                    from api.serializers import DoctorSerializer
-                    from api.ranking_service import DoctorRankingService
-
-                    # Get doctors matching the predicted specialty
-                    doctors = Doctor.objects.filter(
-                        specialty__iexact=predicted_specialist,
-                        approval_status='approved',
-                        is_blocked=False
-                    )
-
-                    # Calculate ranking scores
-                    doctor_scores = []
-                    for doctor in doctors:
-                        score = DoctorRankingService.calculate_score(
-                            doctor=doctor,
-                            predicted_specialty=predicted_specialist
-                        )
-                        doctor_scores.append((doctor, score))
-
-                    # Sort by ranking score (highest first) - return all doctors
-                    doctor_scores.sort(key=lambda x: x[1], reverse=True)
-                    all_ranked_doctors = [doctor for doctor, score in doctor_scores]
-
-                    # Serialize doctors
-                    serializer = DoctorSerializer(
-                        all_ranked_doctors,
-                        many=True,
-                        context={'request': request, 'predicted_specialty': predicted_specialist}
-                    )
-                    ranked_doctors = serializer.data
-
-                except Exception as e:
-                    print(f"[ML Predict] Error fetching ranked doctors: {e}")
-                    # Continue even if doctor ranking fails
-
-            # Add ranked doctors to response
-            ml_response['ranked_doctors'] = ranked_doctors
-            ml_response['total_doctors_found'] = len(ranked_doctors)
-
-            return Response(ml_response, status=status.HTTP_200_OK)
-        else:
-            error_data = response.json() if response.headers.get('content-type') == 'application/json' else {'error': 'ML API error'}
-            return Response(error_data, status=response.status_code)
-
-    except requests.exceptions.ConnectionError:
-        return Response({
-            'error': 'ML prediction service is not available. Please ensure the ML Flask server is running on port 5174.'
-        }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+    Doctors are ranked with the named RankingWeightProfile, else the A/B
+    cohort of the patient, else the default profile; "weight_profile" in the
+    response names the one used.
 
-    except requests.exceptions.Timeout:
-        return Response({
-            'error': 'ML prediction service timed out'
-        }, status=status.HTTP_504_GATEWAY_TIMEOUT)
+    Every prediction is stored as a SymptomPrediction and returned again, with
+    "saved_prediction": true, for the same symptoms and top_k until the ML
+    model version changes - repeat visits cost no inference. With the 'http'
+    backend the version is re-read from the ML service every
+    ML_API_VERSION_TTL seconds, so for that long after a hot model reload the
+    previous model's saved predictions can still be returned. With
+    ML_SAVED_PREDICTIONS off nothing is stored or reused.
 
+    The prediction is linked to a new Symptom record of the patient only when
+    the request carries the patient_id patient's token ("Authorization: Token
+    ..." from patient login); otherwise patient_id just selects the A/B
+    cohort. The endpoint itself needs no authentication, and an invalid token
+    is answered with 401.
+    """
+    try:
+        symptoms, top_k, limit = _parse_prediction_request(request.data)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    predictor = get_predictor()
+    try:
+        patient, profile, ml_response = _prepare_prediction(request, request.data, symptoms, top_k, predictor)
+        predicted = ml_response is None
+        if predicted:
+            ml_response = predictor.predict(symptoms, top_k)
+        _finish_prediction(ml_response, request, symptoms, top_k, limit, patient, profile, predicted)
+    except PredictionError as e:
+        return Response(e.data, status=e.status_code)
     except Exception as e:
         return Response({
             'error': f'Failed to get prediction: {str(e)}'
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    return Response(ml_response, status=status.HTTP_200_OK)
+
+
+async def predict_specialist_async(request):
+    """
+    Async variant of predict_specialist (same request and response), for
+    running under ASGI: the worker's event loop keeps serving other requests
+    while this one waits for the ML service. The ORM and the serializers are
+    synchronous, so the database work runs in two thread-pool hops: one
+    before the ML call (token, patient, weight profile, saved prediction) and
+    one after it (storing the prediction, ranking the doctors).
+
+    Plain Django view - DRF 3.14 has no async view support.
+    """
+    if request.method != 'POST':
+        return JsonResponse({'error': f'Method "{request.method}" not allowed.'}, status=405)
+
+    try:
+        data = json.loads(request.body or b'{}')
+        if not isinstance(data, dict):
+            raise ValueError
+    except ValueError:
+        return JsonResponse({'error': 'Request body must be a JSON object'}, status=400)
+
+    try:
+        symptoms, top_k, limit = _parse_prediction_request(data)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    predictor = get_predictor()
+    try:
+        patient, profile, ml_response = await sync_to_async(_prepare_prediction)(
+            request, data, symptoms, top_k, predictor
+        )
+        predicted = ml_response is None
+        if predicted:
+            ml_response = await predictor.apredict(symptoms, top_k)
+        await sync_to_async(_finish_prediction)(
+            ml_response, request, symptoms, top_k, limit, patient, profile, predicted
+        )
+    except PredictionError as e:
+        return JsonResponse(e.data, status=e.status_code)
+    except Exception as e:
+        return JsonResponse({'error': f'Failed to get prediction: {str(e)}'}, status=500)
+
+    return JsonResponse(ml_response)
+
+
+# Same CSRF handling as the DRF view (django's csrf_exempt decorator only
+# wraps async views correctly from Django 5.0)
+predict_specialist_async.csrf_exempt = True
+
+
+def _parse_prediction_request(data):
+    """
+    Validate a predict-specialist request body
+
+    Returns:
+        (symptoms, top_k, limit)
+
+    Raises:
+        ValueError: invalid symptoms or limit (top_k is validated by the predictor)
+    """
+    from api.ranking_service import DoctorRankingService
+
+    symptoms = data.get('symptoms', [])
+    if not symptoms or not isinstance(symptoms, list):
+        raise ValueError('Please provide a list of symptoms')
+
+    limit, _ = DoctorRankingService.parse_page_params(data.get('limit'), None)
+    return symptoms, data.get('top_k'), limit
+
+
+def _token_user(request):
+    """User of the request's "Authorization: Token ..." header (None without one)"""
+    result = TokenAuthentication().authenticate(request)
+    return result[0] if result else None
+
+
+def _prepare_prediction(request, data, symptoms, top_k, predictor):
+    """
+    Database work of a predict-specialist request before the ML call: the
+    token user, the patient, the weight profile and a saved prediction to reuse
+
+    Returns:
+        (patient, profile, saved): saved is the stored ML response, None when
+        the model has to be called
+
+    Raises:
+        PredictionError: the error response to return (401, 404 or 400)
+    """
+    try:
+        user = _token_user(request)
+    except AuthenticationFailed as e:
+        raise PredictionError({'detail': str(e.detail)}, 401)
+
+    patient_id = data.get('patient_id')
+    try:
+        patient = _get_patient(patient_id, user)
+    except ValueError as e:
+        raise PredictionError({'error': str(e)}, 404)
+
+    try:
+        profile = get_weight_profile(data.get('weight_profile'), patient_id or None)
+    except ValueError as e:
+        raise PredictionError({'error': str(e)}, 400)
+
+    return patient, profile, _find_saved_prediction(predictor, symptoms, top_k, patient)
+
+
+def _finish_prediction(ml_response, request, symptoms, top_k, limit, patient, profile, store):
+    """Database work after the ML call: store a new prediction, add the ranked doctors"""
+    if store:
+        _save_prediction(ml_response, symptoms, top_k, patient)
+    _add_ranked_doctors(ml_response, request, limit, profile)
+
+
+def _get_patient(patient_id, user):
+    """
+    The patient whose history a prediction is recorded in: the patient_id one,
+    when user is that patient (None otherwise, or when no patient_id is given)
+    """
+    from api.models import Patient
+
+    if not patient_id:
+        return None
+    patient = Patient.objects.filter(id=patient_id).first()
+    if patient is None:
+        raise ValueError('Patient not found')
+
+    # patient_login issues the patient's token to this user
+    if user is None or not user.is_authenticated or user.email != f"patient_{patient.id}@system.local":
+        return None
+    return patient
+
+
+def _symptoms_key(symptoms):
+    """Same key for the same symptoms, whatever their order, case or repetition"""
+    normalized = sorted({str(s).strip().lower() for s in symptoms})
+    return hashlib.sha256(json.dumps(normalized).encode()).hexdigest()
+
+
+def _is_reusable_top_k(top_k):
+    # Invalid values are left to the predictor to reject
+    return top_k is None or (isinstance(top_k, int) and not isinstance(top_k, bool) and top_k > 0)
+
+
+def _prediction_response(prediction):
+    """ML response rebuilt from a stored SymptomPrediction"""
+    ml_response = {
+        'predicted_specialist': prediction.predicted_specialist,
+        'recognized_symptoms': prediction.recognized_symptoms,
+        'unrecognized_symptoms': prediction.unrecognized_symptoms,
+        'model_version': prediction.model_version,
+        'prediction_id': str(prediction.id),
+    }
+    if prediction.top_specialists is not None:
+        ml_response['top_specialists'] = prediction.top_specialists
+    return ml_response
+
+
+def _find_saved_prediction(predictor, symptoms, top_k, patient=None):
+    """
+    ML response stored for the same symptoms and top_k by the model version
+    the predictor serves now, or None when a new prediction is needed
+
+    A result first stored for another patient is copied into this patient's
+    history (no inference either way).
+    """
+    from api.models import SymptomPrediction
+
+    if not settings.ML_SAVED_PREDICTIONS or not _is_reusable_top_k(top_k):
+        return None
+
+    model_version = predictor.model_version()
+    if not model_version:
+        return None
+
+    predictions = SymptomPrediction.objects.filter(
+        symptoms_key=_symptoms_key(symptoms),
+        model_version=model_version,
+        top_k=top_k
+    )
+    # Prefer the patient's own record so revisits add nothing to the history
+    prediction = (predictions.filter(patient=patient).first() if patient is not None else None) or predictions.first()
+    if prediction is None:
+        return None
+
+    if patient is not None and prediction.patient_id != patient.id:
+        prediction = _save_prediction(_prediction_response(prediction), symptoms, top_k, patient)
+
+    ml_response = _prediction_response(prediction)
+    ml_response['saved_prediction'] = True
+    return ml_response
+
+
+def _save_prediction(ml_response, symptoms, top_k, patient=None):
+    """
+    Store a successful ML response (and, for a patient, a Symptom record of
+    the submission); adds "prediction_id" to the response
+    """
+    from api.models import Symptom, SymptomPrediction
+
+    if not settings.ML_SAVED_PREDICTIONS:
+        return None
+    if not ml_response.get('model_version') or ml_response.get('served_from_fallback') or not _is_reusable_top_k(top_k):
+        return None
+
+    symptom = None
+    if patient is not None:
+        symptom = Symptom.objects.create(
+            patient=patient,
+            symptom_description=', '.join(str(s) for s in symptoms)
+        )
+
+    prediction = SymptomPrediction.objects.create(
+        patient=patient,
+        symptom=symptom,
+        symptoms=[str(s) for s in symptoms],
+        symptoms_key=_symptoms_key(symptoms),
+        top_k=top_k,
+        model_version=ml_response['model_version'],
+        predicted_specialist=ml_response['predicted_specialist'],
+        top_specialists=ml_response.get('top_specialists'),
+        recognized_symptoms=ml_response.get('recognized_symptoms', []),
+        unrecognized_symptoms=ml_response.get('unrecognized_symptoms', []),
+    )
+    ml_response['prediction_id'] = str(prediction.id)
+    return prediction
+
+
+def _add_ranked_doctors(ml_response, request, limit, profile=None):
+    """Add the ranked doctors of the predicted (and top-k) specialties to an ML response"""
+    predicted_specialist = ml_response.get('predicted_specialist')
+
+    # Fetch and rank doctors by the predicted specialty (and the other
+    # top-k specialties, when requested) with a single doctor query
+    specialties = [predicted_specialist] if predicted_specialist else []
+    for entry in ml_response.get('top_specialists', []):
+        if entry['specialist'] not in specialties:
+            specialties.append(entry['specialist'])
+
+    ranked_by_specialty, next_cursors, totals = {}, {}, {}
+    if specialties:
+        try:
+            ranked_by_specialty, next_cursors, totals = _rank_doctors_by_specialty(
+                specialties, request, limit, profile
+            )
+        except Exception as e:
+            print(f"[ML Predict] Error fetching ranked doctors: {e}")
+            # Continue even if doctor ranking fails
+
+    ranked_doctors = ranked_by_specialty.get(predicted_specialist, [])
+    if 'top_specialists' in ml_response:
+        ml_response['ranked_doctors_by_specialty'] = ranked_by_specialty
+        if limit is not None:
+            ml_response['next_cursor_by_specialty'] = next_cursors
+
+    # Add ranked doctors to response
+    ml_response['ranked_doctors'] = ranked_doctors
+    ml_response['total_doctors_found'] = totals.get(predicted_specialist, 0)
+    if limit is not None:
+        ml_response['next_cursor'] = next_cursors.get(predicted_specialist)
+    if profile is not None:
+        ml_response['weight_profile'] = profile.name
+
+
+@api_view(['GET'])
+@authentication_classes([TokenAuthentication])
+@permission_classes([IsAdminUser])
+def predict_specialist_stats(request):
+    """
+    Metrics of the ML predictor backend: for 'http' the circuit breaker state
+    and transitions, retries and fallback cache use; for 'inprocess' the
+    loaded model version. Admins only (it exposes the service URL / folder).
+    """
+    return Response(get_predictor().info(), status=status.HTTP_200_OK)
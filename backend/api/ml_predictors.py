@@ -0,0 +1,445 @@
+"""
+ML Predictor Backends
+Pluggable engines behind the predict-specialist endpoint, selected with the
+ML_PREDICTOR_BACKEND setting:
+
+- 'http': calls the Flask ML API (New folder/ML/flask_api.py) over HTTP
+- 'inprocess': loads the model artifacts inside the Django worker once, on
+  first use, and predicts without a network hop. Needs the packages of
+  New folder/ML/requirements.txt installed in the Django environment.
+"""
+import asyncio
+import os
+import random
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+from api.circuit_breaker import CircuitBreaker
+
+
+class PredictionError(Exception):
+    """
+    Prediction failure carrying the HTTP status and response body that the
+    predict-specialist view should return
+    """
+
+    def __init__(self, data, status_code):
+        super().__init__(data.get('error', 'ML prediction failed'))
+        self.data = data
+        self.status_code = status_code
+
+
+class HTTPPredictor:
+    """
+    Predicts through the Flask ML API
+
+    Uses one pooled keep-alive session per process (and an httpx client per
+    event loop for async views), separate connect/read timeouts and a few
+    retries with jittered backoff for connection errors and 502/503/504
+    responses. A circuit breaker fast-fails while the service
+    keeps failing; meanwhile the last good response for the same symptoms is
+    served from a small fallback cache when there is one.
+    """
+
+    name = 'http'
+
+    RETRY_STATUSES = (502, 503, 504)
+
+    def __init__(self, url, connect_timeout=1.0, read_timeout=5.0, retries=2,
+                 backoff=0.05, pool_size=10, breaker=None, fallback_size=512, version_ttl=30.0):
+        self.url = url
+        self.timeout = (connect_timeout, read_timeout)
+        self.retries = retries
+        self.backoff = backoff
+        self.breaker = breaker or CircuitBreaker()
+        # Seconds a model version read from the service is trusted
+        self.version_ttl = version_ttl
+
+        self.pool_size = pool_size
+        self._version = None
+        self._version_checked_at = None
+        self._async_http = None
+        self._async_client_loop = None
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        self.fallback_size = fallback_size
+        self._fallback = OrderedDict()
+        self._fallback_lock = threading.Lock()
+        self._fallback_hits = 0
+        self._retries_done = 0
+
+    def predict(self, symptoms, top_k=None):
+        payload, key = self._prepare(symptoms, top_k)
+        if not self.breaker.allow():
+            return self._short_circuited(key)
+
+        try:
+            response = self._post(payload)
+        except requests.exceptions.ConnectionError:
+            return self._connection_failed(key)
+        except requests.exceptions.Timeout:
+            return self._timed_out(key)
+        except requests.exceptions.RequestException:
+            # e.g. a response cut off mid-body (ChunkedEncodingError)
+            return self._bad_response(key)
+        except Exception:
+            # Every call must end in record_success/record_failure, or a
+            # half-open trial would never finish and the circuit stay shut
+            self.breaker.record_failure()
+            raise
+
+        return self._handle_response(key, response)
+
+    async def apredict(self, symptoms, top_k=None):
+        """predict() for async views, over a non-blocking httpx client"""
+        import httpx
+
+        payload, key = self._prepare(symptoms, top_k)
+        if not self.breaker.allow():
+            return self._short_circuited(key)
+
+        try:
+            response = await self._apost(payload)
+        except (httpx.ConnectError, httpx.ConnectTimeout):
+            return self._connection_failed(key)
+        except httpx.TimeoutException:
+            return self._timed_out(key)
+        except httpx.HTTPError:
+            # e.g. ReadError or RemoteProtocolError on a cut-off response
+            return self._bad_response(key)
+        except asyncio.CancelledError:
+            # The client went away; says nothing about the service
+            self.breaker.abandon()
+            raise
+        except Exception:
+            self.breaker.record_failure()
+            raise
+
+        return self._handle_response(key, response)
+
+    @staticmethod
+    def _prepare(symptoms, top_k):
+        payload = {'symptoms': symptoms}
+        if top_k is not None:
+            payload['top_k'] = top_k
+        return payload, (tuple(sorted(str(s) for s in symptoms)), top_k)
+
+    def _short_circuited(self, key):
+        return self._serve_fallback(key, {
+            'error': 'ML prediction service is temporarily unavailable'
+        }, 503)
+
+    def _connection_failed(self, key):
+        self.breaker.record_failure()
+        return self._serve_fallback(key, {
+            'error': 'ML prediction service is not available. Please ensure the ML Flask server is running on port 5174.'
+        }, 503)
+
+    def _timed_out(self, key):
+        self.breaker.record_failure()
+        return self._serve_fallback(key, {'error': 'ML prediction service timed out'}, 504)
+
+    def _bad_response(self, key):
+        self.breaker.record_failure()
+        return self._serve_fallback(key, {'error': 'ML prediction service returned an invalid response'}, 502)
+
+    def _handle_response(self, key, response):
+        if response.status_code >= 500:
+            self.breaker.record_failure()
+            return self._serve_fallback(key, self._error_data(response), response.status_code)
+
+        if response.status_code != 200:
+            # 4xx answers (e.g. no recognized symptoms) mean the service is healthy
+            self.breaker.record_success()
+            raise PredictionError(self._error_data(response), response.status_code)
+
+        try:
+            ml_response = response.json()
+        except ValueError:
+            ml_response = None
+        if not isinstance(ml_response, dict):
+            return self._bad_response(key)
+
+        self.breaker.record_success()
+        self._remember(key, ml_response)
+        if ml_response.get('model_version'):
+            self._version = ml_response['model_version']
+            self._version_checked_at = time.monotonic()
+        return ml_response
+
+    def model_version(self):
+        """
+        Version of the model the service currently serves (None when unknown),
+        read from the service root at most every version_ttl seconds - after a
+        hot reload of the service the old version is reported until then
+        """
+        if self._version_checked_at is not None and time.monotonic() - self._version_checked_at < self.version_ttl:
+            return self._version
+        if not self.breaker.allow():
+            return None
+
+        try:
+            response = self.session.get(self.url.rsplit('/', 1)[0] + '/', timeout=self.timeout)
+            data = response.json() if response.status_code == 200 else {}
+            version = data.get('model_version') if isinstance(data, dict) else None
+        except Exception:
+            self.breaker.record_failure()
+            return None
+
+        self.breaker.record_success()
+        self._version = version
+        self._version_checked_at = time.monotonic()
+        return version
+
+    def _post(self, payload):
+        attempt = 0
+        while True:
+            try:
+                response = self.session.post(self.url, json=payload, timeout=self.timeout)
+                if response.status_code not in self.RETRY_STATUSES or attempt >= self.retries:
+                    return response
+            except (requests.exceptions.ConnectionError, requests.exceptions.ConnectTimeout):
+                # Read timeouts are not retried: the service is up but slow,
+                # and a retry would only hold this worker longer
+                if attempt >= self.retries:
+                    raise
+
+            attempt += 1
+            self._retries_done += 1
+            # Full jitter so concurrent workers don't retry in lockstep
+            time.sleep(random.uniform(0, self.backoff * (2 ** attempt)))
+
+    async def _apost(self, payload):
+        import httpx
+
+        client = await self._async_client()
+        attempt = 0
+        while True:
+            try:
+                response = await client.post(self.url, json=payload)
+                if response.status_code not in self.RETRY_STATUSES or attempt >= self.retries:
+                    return response
+            except (httpx.ConnectError, httpx.ConnectTimeout):
+                if attempt >= self.retries:
+                    raise
+
+            attempt += 1
+            self._retries_done += 1
+            await asyncio.sleep(random.uniform(0, self.backoff * (2 ** attempt)))
+
+    async def _async_client(self):
+        # httpx clients belong to one event loop; ASGI servers run one loop
+        # per worker, so this is normally created once
+        import httpx
+
+        loop = asyncio.get_running_loop()
+        if self._async_client_loop is not loop:
+            old_client, old_loop = self._async_http, self._async_client_loop
+            self._async_client_loop = loop
+            self._async_http = httpx.AsyncClient(
+                timeout=httpx.Timeout(self.timeout[1], connect=self.timeout[0]),
+                limits=httpx.Limits(max_connections=self.pool_size, max_keepalive_connections=self.pool_size),
+            )
+            if old_client is not None:
+                await self._close_async_client(old_client, old_loop)
+        return self._async_http
+
+    @staticmethod
+    async def _close_async_client(client, loop):
+        """
+        Close the client of a previous event loop: on that loop while it still
+        runs (in another thread), here once it has stopped
+        """
+        try:
+            if loop.is_running() and not loop.is_closed():
+                asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+            else:
+                await client.aclose()
+        except Exception as e:
+            print(f"[ML Predict] Could not close the previous ML API client: {e}")
+
+    @staticmethod
+    def _error_data(response):
+        if response.headers.get('content-type') == 'application/json':
+            try:
+                data = response.json()
+            except ValueError:
+                data = None
+            if isinstance(data, dict):
+                return data
+        return {'error': 'ML API error'}
+
+    def _remember(self, key, ml_response):
+        if self.fallback_size <= 0:
+            return
+        with self._fallback_lock:
+            self._fallback[key] = ml_response
+            self._fallback.move_to_end(key)
+            while len(self._fallback) > self.fallback_size:
+                self._fallback.popitem(last=False)
+
+    def _serve_fallback(self, key, error_data, status_code):
+        with self._fallback_lock:
+            cached = self._fallback.get(key)
+            if cached is not None:
+                self._fallback_hits += 1
+        if cached is None:
+            raise PredictionError(error_data, status_code)
+        return dict(cached, served_from_fallback=True)
+
+    def info(self):
+        with self._fallback_lock:
+            fallback = {
+                'size': len(self._fallback),
+                'max_size': self.fallback_size,
+                'hits': self._fallback_hits,
+            }
+        return {
+            'backend': self.name,
+            'url': self.url,
+            'connect_timeout': self.timeout[0],
+            'read_timeout': self.timeout[1],
+            'retries': self._retries_done,
+            'circuit_breaker': self.breaker.stats(),
+            'fallback_cache': fallback,
+        }
+
+
+class InProcessPredictor:
+    """
+    Predicts with the specialist model loaded inside this process
+
+    The model is loaded by the ML service's own specialist_model module (so
+    both backends give identical results) the first time predict() is called,
+    and then shared by every thread of the worker.
+    """
+
+    name = 'inprocess'
+
+    ARTIFACT_FILE = 'specialist_model.ubj'
+    MODEL_FILE = 'xgb_specialist_model.joblib'
+    LABEL_ENCODER_FILE = 'label_encoder.joblib'
+    FEATURES_FILE = 'feature_columns.joblib'
+
+    def __init__(self, service_dir, nthread=None):
+        self.service_dir = str(service_dir)
+        self.nthread = nthread
+        self._model = None
+        self._module = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._model is not None:
+            return self._model, self._module
+
+        with self._lock:
+            if self._model is not None:
+                return self._model, self._module
+
+            if self.service_dir not in sys.path:
+                sys.path.insert(0, self.service_dir)
+            import specialist_model as module
+
+            def path(name):
+                return os.path.join(self.service_dir, name)
+
+            try:
+                self._model = module.load_specialist_model(
+                    path(self.ARTIFACT_FILE),
+                    path(self.MODEL_FILE),
+                    path(self.LABEL_ENCODER_FILE),
+                    path(self.FEATURES_FILE),
+                    nthread=self.nthread,
+                )
+            except Exception as e:
+                print(f"[ML Predict] Failed to load model from {self.service_dir}: {e}")
+                raise PredictionError({'error': 'ML model could not be loaded'}, 503)
+
+            self._module = module
+            print(f"[ML Predict] Loaded specialist model {self._model.version} in-process")
+            return self._model, self._module
+
+    def predict(self, symptoms, top_k=None):
+        model, module = self._load()
+
+        indices, recognized, unrecognized = model.resolve_symptoms(symptoms)
+        if not recognized:
+            raise PredictionError({'error': 'No valid symptoms recognized'}, 400)
+
+        try:
+            top_k = module.parse_top_k(model, {'top_k': top_k})
+        except ValueError as e:
+            raise PredictionError({'error': str(e)}, 400)
+
+        proba = model.predict_proba_indices(indices)
+
+        result = {
+            'predicted_specialist': str(model.classes[int(proba.argmax())]),
+            'recognized_symptoms': recognized,
+            'unrecognized_symptoms': unrecognized,
+            'model_version': model.version,
+        }
+        if top_k is not None:
+            result['top_specialists'] = module.top_specialists(model, proba, top_k)
+        return result
+
+    def model_version(self):
+        model, _ = self._load()
+        return model.version
+
+    async def apredict(self, symptoms, top_k=None):
+        """predict() for async views; the model runs in a worker thread"""
+        from asgiref.sync import sync_to_async
+        return await sync_to_async(self.predict, thread_sensitive=False)(symptoms, top_k)
+
+    def info(self):
+        return {
+            'backend': self.name,
+            'service_dir': self.service_dir,
+            'loaded': self._model is not None,
+            'model_version': self._model.version if self._model is not None else None,
+        }
+
+
+_predictors = {}
+_predictors_lock = threading.Lock()
+
+
+def get_predictor(backend=None):
+    """
+    The predictor for the configured (or given) backend, created once per
+    process and reused by every request
+    """
+    backend = backend or settings.ML_PREDICTOR_BACKEND
+    with _predictors_lock:
+        predictor = _predictors.get(backend)
+        if predictor is None:
+            if backend == 'http':
+                predictor = HTTPPredictor(
+                    settings.ML_API_URL,
+                    connect_timeout=settings.ML_API_CONNECT_TIMEOUT,
+                    read_timeout=settings.ML_API_READ_TIMEOUT,
+                    retries=settings.ML_API_RETRIES,
+                    pool_size=settings.ML_API_POOL_SIZE,
+                    version_ttl=settings.ML_API_VERSION_TTL,
+                    breaker=CircuitBreaker(
+                        failure_threshold=settings.ML_API_BREAKER_THRESHOLD,
+                        reset_timeout=settings.ML_API_BREAKER_RESET,
+                    ),
+                )
+            elif backend == 'inprocess':
+                predictor = InProcessPredictor(settings.ML_SERVICE_DIR, settings.ML_MODEL_NTHREAD)
+            else:
+                raise ValueError(f"Unknown ML_PREDICTOR_BACKEND '{backend}' (expected 'http' or 'inprocess')")
+            _predictors[backend] = predictor
+        return predictor
@@ -1,6 +1,11 @@
+from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
+from django.db.models import F, Q
+from django.db.models.functions import Cast, Upper
 from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex, OpClass
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
+from api.doctor_search import SEARCH_FIELDS, doctor_search_vector
 import uuid
 from django.utils import timezone
 
@@ -69,11 +74,39 @@ class Doctor(models.Model):
     sentiment_score = models.FloatField(default=0.0, help_text='Sentiment score from feedback analysis (0-100, default 0 until Phase 3)')
     sentiment_updated_at = models.DateTimeField(null=True, blank=True)
 
+    # Stored ranking (DoctorRankingService.refresh_stored_scores): score within
+    # the doctor's own specialty, refreshed on relevant writes and by
+    # `manage.py refresh_ranking_scores`
+    ranking_score = models.FloatField(default=0.0)
+    ranking_components = models.JSONField(default=dict, blank=True, help_text='Raw 0-100 score of each ranking component')
+    ranking_updated_at = models.DateTimeField(null=True, blank=True)
+    ranking_rating_prior = models.FloatField(null=True, blank=True, help_text='Rating prior mean the stored score was computed with')
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         db_table = 'doctors'
+        indexes = [
+            # Ranked listing of one specialty (specialty__iexact) is a single
+            # range scan of this index
+            models.Index(
+                Upper('specialty'), 'approval_status', 'is_blocked', F('ranking_score').desc(), 'id',
+                name='doctor_specialty_ranking_idx',
+            ),
+            # Doctor search (api/doctor_search.py): full-text vector, and
+            # trigram indexes matching the UPPER(column::text) LIKE of icontains
+            GinIndex(doctor_search_vector(), name='doctor_search_vector_idx'),
+            *[
+                GinIndex(
+                    OpClass(Upper(Cast(field, output_field=models.TextField())), name='gin_trgm_ops'),
+                    name=f'doctor_{field}_trgm_idx',
+                )
+                for field in SEARCH_FIELDS
+            ],
+            # Keyset pagination (api/pagination.py) of the admin doctor list
+            models.Index(fields=['created_at', 'id'], name='doctor_keyset_idx'),
+        ]
 
     def __str__(self):
         return f"Dr. {self.first_name} {self.last_name}"
@@ -112,6 +145,9 @@ class Patient(models.Model):
 
     class Meta:
         db_table = 'patients'
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='patient_keyset_idx'),
+        ]
 
     def __str__(self):
         return f"{self.first_name} {self.last_name}"
@@ -123,11 +159,31 @@ class HospitalLocation(models.Model):
     name = models.CharField(max_length=200)
     address = models.TextField()  # Complete address including street, city, state
     phone = models.CharField(max_length=20, null=True, blank=True)
+    latitude = models.DecimalField(
+        max_digits=9, decimal_places=6, null=True, blank=True,
+        validators=[MinValueValidator(-90), MaxValueValidator(90)]
+    )
+    longitude = models.DecimalField(
+        max_digits=9, decimal_places=6, null=True, blank=True,
+        validators=[MinValueValidator(-180), MaxValueValidator(180)]
+    )
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         db_table = 'hospital_locations'
+        indexes = [
+            # Bounding-box range scans of the nearby-doctor search (api/geo.py)
+            models.Index(fields=['latitude', 'longitude'], name='hospital_location_coords_idx'),
+        ]
+        constraints = [
+            models.CheckConstraint(
+                check=Q(latitude__gte=-90, latitude__lte=90), name='hospital_location_latitude_range'
+            ),
+            models.CheckConstraint(
+                check=Q(longitude__gte=-180, longitude__lte=180), name='hospital_location_longitude_range'
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -202,6 +258,12 @@ class Appointment(models.Model):
     class Meta:
         db_table = 'appointments'
         ordering = ['-appointment_date', '-appointment_time']
+        indexes = [
+            # Keyset pagination (api/pagination.py), overall and per doctor / patient
+            models.Index(fields=['appointment_date', 'appointment_time', 'id'], name='appointment_keyset_idx'),
+            models.Index(fields=['doctor', 'appointment_date', 'appointment_time', 'id'], name='appointment_doctor_keyset_idx'),
+            models.Index(fields=['patient', 'appointment_date', 'appointment_time', 'id'], name='appointment_patient_keyset_idx'),
+        ]
 
     def __str__(self):
         return f"{self.patient} - {self.doctor} on {self.appointment_date}"
@@ -227,6 +289,9 @@ class Notification(models.Model):
     class Meta:
         db_table = 'notifications'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='notification_keyset_idx'),
+        ]
 
     def __str__(self):
         return f"{self.notification_type} - {self.title}"
@@ -261,6 +326,77 @@ class Feedback(models.Model):
         return f"Feedback for {self.doctor} - Rating: {self.rating}"
 
 
+class DoctorRatingStats(models.Model):
+    """
+    Per-doctor feedback rating totals, kept up to date by the Feedback
+    signals in api/signals.py (rebuild with `manage.py rebuild_rating_stats`)
+
+    Doctors that never received feedback have no row.
+    """
+    doctor = models.OneToOneField(Doctor, on_delete=models.CASCADE, primary_key=True, related_name='rating_stats')
+    rating_sum = models.IntegerField(default=0)
+    rating_count = models.IntegerField(default=0)
+    avg_rating = models.FloatField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'doctor_rating_stats'
+
+    def __str__(self):
+        return f"{self.doctor} - {self.avg_rating} ({self.rating_count} ratings)"
+
+
+class RankingWeightProfile(models.Model):
+    """
+    Named set of doctor ranking weights, editable at runtime
+
+    A request picks a profile by name (weight_profile parameter); otherwise
+    users are split between the profiles with a cohort_share (A/B test), and
+    everyone else gets the default profile, which the stored
+    Doctor.ranking_score is computed with. See api/ranking_weights.py.
+    """
+    name = models.SlugField(max_length=50, unique=True)
+    description = models.CharField(max_length=255, blank=True)
+    rating = models.FloatField(default=0.40)
+    experience = models.FloatField(default=0.30)
+    feedback_count = models.FloatField(default=0.20)
+    sentiment = models.FloatField(default=0.00)
+    specialty_match = models.FloatField(default=0.10)
+    is_default = models.BooleanField(default=False, help_text='Used by requests that select no profile and are in no cohort')
+    cohort_share = models.PositiveIntegerField(default=0, help_text='Relative share of patients assigned to this profile (0 = not in the A/B test)')
+    is_active = models.BooleanField(default=True)
+    version = models.PositiveIntegerField(default=1, editable=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    WEIGHT_FIELDS = ('rating', 'experience', 'feedback_count', 'sentiment', 'specialty_match')
+
+    class Meta:
+        db_table = 'ranking_weight_profiles'
+        ordering = ['name']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['is_default'], condition=models.Q(is_default=True), name='single_default_ranking_profile'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.name} v{self.version}{' (default)' if self.is_default else ''}"
+
+    @property
+    def weights(self):
+        return {field: getattr(self, field) for field in self.WEIGHT_FIELDS}
+
+    @property
+    def includes_sentiment(self):
+        return self.sentiment > 0
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            self.version += 1
+        super().save(*args, **kwargs)
+
+
 class FeedbackMessage(models.Model):
     SENDER_TYPE_CHOICES = [
         ('patient', 'Patient'),
@@ -327,6 +463,37 @@ class Symptom(models.Model):
         return f"{self.patient} - {self.symptom_description[:50]}"
 
 
+class SymptomPrediction(models.Model):
+    """
+    Stored output of one specialist prediction
+
+    Reused for later requests with the same symptoms and top_k for as long as
+    the ML model version stays the same.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    patient = models.ForeignKey(Patient, on_delete=models.CASCADE, null=True, blank=True, related_name='symptom_predictions')
+    symptom = models.ForeignKey(Symptom, on_delete=models.SET_NULL, null=True, blank=True, related_name='predictions')
+    symptoms = ArrayField(models.TextField())
+    symptoms_key = models.CharField(max_length=64, help_text='SHA-256 of the normalized, sorted symptom list')
+    top_k = models.IntegerField(null=True, blank=True)
+    model_version = models.CharField(max_length=64)
+    predicted_specialist = models.CharField(max_length=100)
+    top_specialists = models.JSONField(null=True, blank=True, help_text='Specialists with probabilities, most probable first')
+    recognized_symptoms = ArrayField(models.TextField(), default=list)
+    unrecognized_symptoms = ArrayField(models.TextField(), default=list)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'symptom_predictions'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['symptoms_key', 'model_version', 'top_k'], name='symptom_pred_lookup_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.predicted_specialist} ({self.model_version}) - {', '.join(self.symptoms)[:50]}"
+
+
 class PatientNotification(models.Model):
     CATEGORY_CHOICES = [
         ('system', 'System'),
@@ -368,6 +535,9 @@ class Message(models.Model):
     class Meta:
         db_table = 'messages'
         ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='message_keyset_idx'),
+        ]
 
     def __str__(self):
         return f"{self.sender_type} to {self.receiver_type} - {self.created_at}"
@@ -653,6 +823,12 @@ class Transaction(models.Model):
     class Meta:
         db_table = 'transactions'
         ordering = ['-created_at']
+        indexes = [
+            # Keyset pagination (api/pagination.py), overall and per patient / doctor
+            models.Index(fields=['created_at', 'id'], name='transaction_keyset_idx'),
+            models.Index(fields=['patient', 'created_at', 'id'], name='transaction_patient_keyset_idx'),
+            models.Index(fields=['doctor', 'created_at', 'id'], name='transaction_doctor_keyset_idx'),
+        ]
         verbose_name = 'Transaction'
         verbose_name_plural = 'Transactions'
 
@@ -0,0 +1,174 @@
+"""
+Keyset Pagination
+Cursor pagination for the large list endpoints. A page continues from the
+sort key of the last row of the previous page (WHERE key < last key) instead
+of skipping rows with OFFSET, so every page is one range scan of the
+matching composite index however deep it is, and no COUNT(*) runs unless
+the client asks for it with ?with_count=true.
+
+Response: {"next": url, "previous": url, "results": [...]}, plus "count"
+when requested
+"""
+import base64
+import binascii
+import json
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Pages rows ordered by `ordering`, which must end with a unique field so
+    the sort key is total, and whose fields must not be null
+
+    A view can change the ordering for a request (e.g. put a search rank
+    first) with a get_keyset_ordering(queryset, ordering) method.
+    """
+
+    ordering = ('-created_at', '-id')
+    page_size = api_settings.PAGE_SIZE
+    cursor_query_param = 'cursor'
+    count_query_param = 'with_count'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+
+        ordering = tuple(self.ordering)
+        if hasattr(view, 'get_keyset_ordering'):
+            ordering = tuple(view.get_keyset_ordering(queryset, ordering))
+        self.fields = [field.lstrip('-') for field in ordering]
+
+        self.count = None
+        if request.query_params.get(self.count_query_param, '').lower() in ('1', 'true'):
+            self.count = queryset.count()
+
+        key, reverse = self.decode_cursor(request)
+        if reverse:
+            # Previous page: walk the key backwards, then restore the order
+            ordering = tuple(field[1:] if field.startswith('-') else f'-{field}' for field in ordering)
+        queryset = queryset.order_by(*ordering)
+        if key is not None:
+            queryset = queryset.filter(self.after(ordering, key))
+
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+
+        self.first_key = self.row_key(rows[0]) if rows else None
+        self.last_key = self.row_key(rows[-1]) if rows else None
+        if reverse:
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, key is not None
+        return rows
+
+    @staticmethod
+    def after(ordering, key):
+        """
+        Rows after key in ordering: (a, b, id) > (x, y, z), written as
+        a >= x AND (a > x OR (a = x AND (b > y OR (b = y AND id > z))))
+        (with < for descending fields); the leading bound alone lets
+        PostgreSQL start an index range scan
+        """
+        condition = None
+        for field, value in reversed(list(zip(ordering, key))):
+            name = field.lstrip('-')
+            beyond = Q(**{f"{name}__{'lt' if field.startswith('-') else 'gt'}": value})
+            condition = beyond if condition is None else beyond | (Q(**{name: value}) & condition)
+
+        first = ordering[0]
+        bound = Q(**{f"{first.lstrip('-')}__{'lte' if first.startswith('-') else 'gte'}": key[0]})
+        return bound & condition
+
+    def row_key(self, row):
+        values = []
+        for field in self.fields:
+            value = getattr(row, field)
+            if hasattr(value, 'isoformat'):
+                # Full precision: DjangoJSONEncoder would drop microseconds
+                value = value.isoformat()
+            elif not isinstance(value, (int, float, str)):
+                value = str(value)
+            values.append(value)
+        return values
+
+    def encode_cursor(self, key, reverse):
+        payload = json.dumps({'k': key, 'r': reverse}, separators=(',', ':'))
+        cursor = base64.urlsafe_b64encode(payload.encode()).decode()
+        return replace_query_param(self.base_url, self.cursor_query_param, cursor)
+
+    def decode_cursor(self, request):
+        """
+        Returns:
+            (key, reverse): key is None on the first page
+        """
+        cursor = request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return None, False
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+            key, reverse = payload['k'], bool(payload['r'])
+        except (TypeError, ValueError, KeyError, UnicodeDecodeError, binascii.Error):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(key, list) or len(key) != len(self.fields):
+            raise NotFound(self.invalid_cursor_message)
+        return key, reverse
+
+    def get_next_link(self):
+        if not self.has_next or self.last_key is None:
+            return None
+        return self.encode_cursor(self.last_key, reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or self.first_key is None:
+            return None
+        return self.encode_cursor(self.first_key, reverse=True)
+
+    def get_paginated_response(self, data):
+        response = {}
+        if self.count is not None:
+            response['count'] = self.count
+        response.update({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+        return Response(response)
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'count': {'type': 'integer', 'example': 123},
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+
+class CreatedAtKeysetPagination(KeysetPagination):
+    """Newest first, on (created_at, id)"""
+
+    ordering = ('-created_at', '-id')
+
+
+class MessageKeysetPagination(KeysetPagination):
+    """Oldest first (conversation order), on (created_at, id)"""
+
+    ordering = ('created_at', 'id')
+
+
+class AppointmentKeysetPagination(KeysetPagination):
+    """Latest appointment slot first, on (appointment_date, appointment_time, id)"""
+
+    ordering = ('-appointment_date', '-appointment_time', '-id')
@@ -3,7 +3,16 @@ Doctor Ranking Service
 Modular service for calculating doctor rankings based on multiple factors
 Supports current metrics and future sentiment analysis integration
 """
-from django.db.models import Avg, Count
+import base64
+import json
+
+import numpy as np
+from django.conf import settings
+from django.db.models import Case, F, FloatField, Q, Value, When
+from django.db.models.functions import Cast, Coalesce, Greatest, Least, NullIf, Round
+
+from api.ranking_weights import get_default_profile
+from api.rating_stats import get_rating_prior
 
 
 class DoctorRankingService:
@@ -11,7 +20,7 @@ class DoctorRankingService:
     Service for calculating composite ranking scores for doctors
 
     Scoring System (Phase 1):
-    - Rating: 40% (average feedback rating)
+    - Rating: 40% (Bayesian-smoothed average feedback rating)
     - Experience: 30% (years of practice)
     - Feedback Count: 20% (number of reviews for credibility)
     - Sentiment: 0% (reserved for Phase 3)
@@ -19,7 +28,10 @@ class DoctorRankingService:
 
     Future (Phase 3):
     - Sentiment will be weighted at 15-20%
-    - Weights will be adjustable dynamically
+
+    Weights are adjustable at runtime with RankingWeightProfile rows (see
+    api/ranking_weights.py); without custom weights the default profile is
+    used, and DEFAULT_WEIGHTS until one is created.
     """
 
     # Default weights for scoring (Phase 1)
@@ -40,6 +52,9 @@ class DoctorRankingService:
         'specialty_match': 0.10, # 10% - Unchanged
     }
 
+    # Score components, in the order they are summed
+    COMPONENTS = ('rating', 'experience', 'feedback_count', 'sentiment', 'specialty_match')
+
     @classmethod
     def calculate_score(cls, doctor, predicted_specialty=None, weights=None, include_sentiment=False):
         """
@@ -54,17 +69,125 @@ class DoctorRankingService:
         Returns:
             float: Composite score (0-100)
         """
-        if weights is None:
-            weights = cls.FUTURE_WEIGHTS if include_sentiment else cls.DEFAULT_WEIGHTS
+        scores = cls.score_many([doctor], predicted_specialty, weights, include_sentiment)
+        return scores[doctor.id]
+
+    @classmethod
+    def score_many(cls, doctors, predicted_specialty=None, weights=None, include_sentiment=False, detailed=False):
+        """
+        Calculate composite ranking scores for many doctors at once
+
+        The inputs of all doctors are fetched in bulk (one query for a
+        queryset; for Doctor instances at most one DoctorRatingStats query,
+        for those without prefetched stats) and each component is computed
+        with NumPy over arrays of every doctor.
+
+        Args:
+            doctors: Doctor queryset, or an iterable of Doctor instances
+            predicted_specialty: Specialty predicted by ML, or a list of
+                specialties (the bonus applies when any of them matches)
+            weights: Custom weight dictionary (optional, default profile otherwise)
+            include_sentiment: Whether to include sentiment analysis (Phase 3)
+            detailed: Return the get_detailed_scores breakdown of each doctor
+                instead of the score
+
+        Returns:
+            dict: doctor id -> composite score (0-100), or breakdown if detailed
+        """
+        weights, include_sentiment, weights_used = cls._resolve_weights(weights, include_sentiment)
+
+        ids, inputs = cls._load_score_inputs(doctors)
+        components = cls._component_scores(inputs, predicted_specialty, include_sentiment)
+
+        total_scores = (
+            components['rating'] * weights['rating'] +
+            components['experience'] * weights['experience'] +
+            components['feedback_count'] * weights['feedback_count'] +
+            components['sentiment'] * weights['sentiment'] +
+            components['specialty_match'] * weights['specialty_match']
+        )
+
+        if not detailed:
+            return {doctor_id: round(float(score), 2) for doctor_id, score in zip(ids, total_scores)}
+
+        breakdowns = {}
+        for i, doctor_id in enumerate(ids):
+            breakdowns[doctor_id] = {
+                'total_score': round(float(total_scores[i]), 2),
+                'components': {
+                    name: {
+                        'raw_score': round(float(components[name][i]), 2),
+                        'weight': weights[name],
+                        'weighted_score': round(float(components[name][i] * weights[name]), 2)
+                    }
+                    for name in cls.COMPONENTS
+                },
+                'weights_used': weights_used
+            }
+        return breakdowns
+
+    @classmethod
+    def annotate_scores(cls, queryset, predicted_specialty=None, weights=None, include_sentiment=False):
+        """
+        Annotate a Doctor queryset with the ranking score computed in SQL
 
-        # Calculate individual component scores
-        rating_score = cls._calculate_rating_score(doctor)
-        experience_score = cls._calculate_experience_score(doctor)
-        feedback_score = cls._calculate_feedback_count_score(doctor)
-        sentiment_score = cls._calculate_sentiment_score(doctor) if include_sentiment else 0
-        specialty_score = cls._calculate_specialty_match_score(doctor, predicted_specialty)
+        Same formula as calculate_score, but for every doctor of the queryset
+        in one query, with ratings read from DoctorRatingStats. Adds:
+            annotated_avg_rating: average feedback rating (None without feedback)
+            annotated_feedback_count: number of feedback entries
+            annotated_ranking_score: composite score (0-100, rounded to 2 decimals)
+
+        Args:
+            queryset: Doctor queryset
+            predicted_specialty: Specialty predicted by ML, or a list of
+                specialties (the bonus applies when any of them matches)
+            weights: Custom weight dictionary (optional)
+            include_sentiment: Whether to include sentiment analysis (Phase 3)
+
+        Returns:
+            QuerySet: annotated queryset, ordered by score (highest first), then id
+        """
+        weights, include_sentiment, _ = cls._resolve_weights(weights, include_sentiment)
+
+        # Read from the per-doctor DoctorRatingStats row (a LEFT JOIN)
+        queryset = queryset.annotate(
+            annotated_avg_rating=Case(
+                When(rating_stats__rating_count__gt=0, then=F('rating_stats__avg_rating')),
+                default=None,
+                output_field=FloatField()
+            ),
+            annotated_feedback_count=Coalesce(F('rating_stats__rating_count'), 0),
+        )
+
+        # Component scores, mirroring _component_scores below
+        prior_mean, prior_weight = get_rating_prior()
+        smoothed_rating = Coalesce(
+            (Value(prior_weight * prior_mean) + Cast(Coalesce(F('rating_stats__rating_sum'), 0), FloatField())) /
+            NullIf(Value(prior_weight) + F('annotated_feedback_count'), 0),
+            Value(prior_mean),
+            output_field=FloatField()
+        )
+        rating_score = smoothed_rating / 5.0 * 100
+        experience_score = Least(
+            Coalesce(F('years_of_experience'), 0) / 20.0 * 100, Value(100.0), output_field=FloatField()
+        )
+        feedback_score = Least(F('annotated_feedback_count') / 50.0 * 100, Value(100.0), output_field=FloatField())
+        if include_sentiment:
+            sentiment_score = Greatest(
+                Value(0.0), Least(Coalesce(F('sentiment_score'), 0.0), Value(100.0)), output_field=FloatField()
+            )
+        else:
+            sentiment_score = Value(0.0)
+
+        specialties = [predicted_specialty] if isinstance(predicted_specialty, str) else (predicted_specialty or [])
+        if specialties:
+            match = Q()
+            for specialty in specialties:
+                match |= Q(specialty__iexact=specialty)
+            specialty_score = Case(When(match, then=Value(100.0)), default=Value(0.0), output_field=FloatField())
+        else:
+            specialty_score = Value(0.0)
 
-        # Weight and combine scores
         total_score = (
             rating_score * weights['rating'] +
             experience_score * weights['experience'] +
@@ -73,101 +196,311 @@ class DoctorRankingService:
             specialty_score * weights['specialty_match']
         )
 
-        return round(total_score, 2)
+        return queryset.annotate(
+            annotated_ranking_score=Round(total_score, 2, output_field=FloatField())
+        ).order_by('-annotated_ranking_score', 'id')
 
-    @staticmethod
-    def _calculate_rating_score(doctor):
+    @classmethod
+    def _resolve_weights(cls, weights, include_sentiment):
         """
-        Calculate score based on average rating
-
         Returns:
-            float: Score 0-100 based on average rating
+            (weights, include_sentiment, weights_used): the given weights, the
+            Phase 3 weights with sentiment, or else the default profile's
         """
-        from api.models import Feedback
+        if weights is not None:
+            return weights, include_sentiment, 'custom'
+        if include_sentiment:
+            return cls.FUTURE_WEIGHTS, True, 'future'
+        profile = get_default_profile()
+        return profile.weights, profile.includes_sentiment, profile.name
 
-        feedback_stats = Feedback.objects.filter(doctor=doctor).aggregate(
-            avg_rating=Avg('rating')
-        )
+    @classmethod
+    def rank_for_specialties(cls, queryset, specialties, profile=None):
+        """
+        Rank doctors of the given specialties (each doctor matching one of
+        them) with a weight profile: by the stored score for the default
+        profile, otherwise with the score computed in SQL
 
-        avg_rating = feedback_stats['avg_rating']
+        Returns:
+            QuerySet: annotated and ordered like annotate_scores
+        """
+        if profile is None or profile.is_default:
+            return cls.rank_within_specialty(queryset)
+        return cls.annotate_scores(
+            queryset, predicted_specialty=specialties,
+            weights=profile.weights, include_sentiment=profile.includes_sentiment
+        )
 
-        if avg_rating is None:
-            # No ratings yet - neutral score
-            return 50.0
+    @classmethod
+    def rank_within_specialty(cls, queryset):
+        """
+        Order a Doctor queryset by the stored ranking score (highest first,
+        then id) - the score each doctor gets when ranked for its own
+        specialty, kept current by refresh_stored_scores
 
-        # Convert rating (typically 1-5 scale) to 0-100 scale
-        # Assuming 5-star rating system
-        return (avg_rating / 5.0) * 100
+        Adds the same annotations as annotate_scores, so serializers and
+        paginate() work with either.
+        """
+        return queryset.annotate(
+            annotated_avg_rating=Case(
+                When(rating_stats__rating_count__gt=0, then=F('rating_stats__avg_rating')),
+                default=None,
+                output_field=FloatField()
+            ),
+            annotated_feedback_count=Coalesce(F('rating_stats__rating_count'), 0),
+            annotated_ranking_score=F('ranking_score'),
+        ).order_by('-ranking_score', 'id')
 
-    @staticmethod
-    def _calculate_experience_score(doctor):
+    @classmethod
+    def refresh_stored_scores(cls, queryset=None, batch_size=500):
         """
-        Calculate score based on years of experience
+        Recompute Doctor.ranking_score / ranking_components for the given
+        doctors (all doctors by default) with one read query and batched
+        bulk updates, using the default weight profile
 
         Returns:
-            float: Score 0-100 based on experience (capped at 20 years = 100)
+            int: number of doctors refreshed
         """
-        years = doctor.years_of_experience or 0
-
-        # Cap at 20 years for 100 score
-        # Linear scale: 0 years = 0, 20+ years = 100
-        score = min((years / 20.0) * 100, 100)
+        from django.utils import timezone
+        from api.models import Doctor
+
+        if queryset is None:
+            queryset = Doctor.objects.all()
+
+        ids, inputs = cls._load_score_inputs(queryset)
+        rating_prior = get_rating_prior()
+        # Each doctor is scored for its own specialty, so every doctor gets
+        # the match bonus. Sentiment is stored too, so Phase 3 weights can be
+        # applied to the stored breakdown later.
+        components = cls._component_scores(
+            inputs, set(inputs['specialty']), include_sentiment=True, rating_prior=rating_prior
+        )
+        profile = get_default_profile()
+        weights = profile.weights
+        sentiment_score = components['sentiment'] if profile.includes_sentiment else 0
+        total_scores = (
+            components['rating'] * weights['rating'] +
+            components['experience'] * weights['experience'] +
+            components['feedback_count'] * weights['feedback_count'] +
+            sentiment_score * weights['sentiment'] +
+            components['specialty_match'] * weights['specialty_match']
+        )
 
-        return score
+        now = timezone.now()
+        doctors = [
+            Doctor(
+                id=doctor_id,
+                ranking_score=round(float(total_scores[i]), 2),
+                ranking_components={name: round(float(components[name][i]), 2) for name in cls.COMPONENTS},
+                ranking_updated_at=now,
+                ranking_rating_prior=rating_prior[0],
+            )
+            for i, doctor_id in enumerate(ids)
+        ]
+        Doctor.objects.bulk_update(
+            doctors, ['ranking_score', 'ranking_components', 'ranking_updated_at', 'ranking_rating_prior'],
+            batch_size=batch_size
+        )
+        return len(doctors)
 
-    @staticmethod
-    def _calculate_feedback_count_score(doctor):
+    @classmethod
+    def refresh_prior_drift(cls):
         """
-        Calculate score based on number of feedback/reviews
-        More reviews = more credibility
+        Refresh the stored scores computed with a rating prior more than
+        RANKING_PRIOR_REFRESH_TOLERANCE away from the current one. Every
+        rating moves the prior (the mean of all ratings), but a feedback
+        change only re-scores the rated doctor at once.
 
         Returns:
-            float: Score 0-100 based on feedback count (capped at 50 reviews = 100)
+            int: number of doctors refreshed
         """
-        from api.models import Feedback
+        from api.models import Doctor
+
+        prior_mean, _ = get_rating_prior()
+        tolerance = settings.RANKING_PRIOR_REFRESH_TOLERANCE
+        stale = Doctor.objects.filter(
+            Q(ranking_rating_prior__isnull=True) |
+            Q(ranking_rating_prior__lt=prior_mean - tolerance) |
+            Q(ranking_rating_prior__gt=prior_mean + tolerance)
+        )
+        return cls.refresh_stored_scores(stale)
 
-        feedback_count = Feedback.objects.filter(doctor=doctor).count()
+    # Largest page of ranked doctors served by one request
+    MAX_PAGE_SIZE = 100
 
-        # Cap at 50 reviews for 100 score
-        # Linear scale: 0 reviews = 0, 50+ reviews = 100
-        score = min((feedback_count / 50.0) * 100, 100)
+    @classmethod
+    def parse_page_params(cls, limit, cursor):
+        """
+        Validate limit/cursor request parameters
 
-        return score
+        Returns:
+            (limit, cursor_position): limit is None when not given (no
+            pagination); cursor_position is None for the first page
 
-    @staticmethod
-    def _calculate_sentiment_score(doctor):
+        Raises:
+            ValueError: invalid limit or cursor
         """
-        Calculate score based on sentiment analysis of feedback comments
+        if limit in (None, ''):
+            if cursor:
+                raise ValueError('cursor requires limit')
+            return None, None
+
+        try:
+            if isinstance(limit, bool):
+                raise ValueError
+            limit = int(limit)
+        except (TypeError, ValueError):
+            raise ValueError('limit must be a positive integer')
+        if limit < 1:
+            raise ValueError('limit must be a positive integer')
+        limit = min(limit, cls.MAX_PAGE_SIZE)
+
+        if not cursor:
+            return limit, None
+        try:
+            position = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+            if 'distance' in position:
+                return limit, (float(position['score']), str(position['id']), float(position['distance']))
+            return limit, (float(position['score']), str(position['id']))
+        except (ValueError, KeyError, TypeError):
+            raise ValueError('Invalid cursor')
 
-        Phase 1: Returns doctor.sentiment_score (default 0)
-        Phase 3: Will analyze recent feedback comments for sentiment
+    @staticmethod
+    def encode_cursor(doctor):
+        """Opaque cursor pointing just after this doctor in the ranking order"""
+        position = {'score': doctor.annotated_ranking_score, 'id': doctor.id}
+        if getattr(doctor, 'distance_km', None) is not None:
+            position['distance'] = doctor.distance_km
+        return base64.urlsafe_b64encode(json.dumps(position).encode()).decode()
 
-        Returns:
-            float: Score 0-100 based on sentiment (0=negative, 50=neutral, 100=positive)
+    @classmethod
+    def paginate(cls, queryset, limit, position=None):
         """
-        # Phase 1: Use stored sentiment_score (default 0 = neutral)
-        # Phase 3: This will be calculated from FeedbackSentiment model
-        sentiment = doctor.sentiment_score or 0.0
+        One page of a queryset returned by annotate_scores or
+        rank_within_specialty, using keyset pagination on (score desc, id asc)
+        so pages stay stable and cheap however deep the client scrolls;
+        nearby listings (api.geo.filter_near) page on (distance asc, score
+        desc, id asc)
 
-        # Ensure score is in 0-100 range
-        return max(0, min(sentiment, 100))
+        Returns:
+            (doctors, next_cursor): next_cursor is None on the last page
+        """
+        if position is not None:
+            score, doctor_id, *distance = position
+            after = (
+                Q(annotated_ranking_score__lt=score) |
+                Q(annotated_ranking_score=score, id__gt=doctor_id)
+            )
+            if distance:
+                after = Q(distance_km__gt=distance[0]) | (Q(distance_km=distance[0]) & after)
+            queryset = queryset.filter(after)
+
+        doctors = list(queryset[:limit + 1])
+        if len(doctors) > limit:
+            doctors = doctors[:limit]
+            return doctors, cls.encode_cursor(doctors[-1])
+        return doctors, None
 
     @staticmethod
-    def _calculate_specialty_match_score(doctor, predicted_specialty):
+    def _load_score_inputs(doctors):
         """
-        Calculate bonus score if doctor's specialty matches ML prediction
+        Fetch the scoring inputs of many doctors in bulk
 
         Returns:
-            float: 100 if match, 0 if no match or no prediction
+            (ids, inputs): doctor ids, and a dict of per-doctor arrays in the
+            same order plus the list of their specialties
         """
-        if predicted_specialty is None:
-            return 0.0
+        from django.db.models import QuerySet
+        from api.models import Doctor, DoctorRatingStats
+
+        if isinstance(doctors, QuerySet):
+            rows = list(doctors.order_by().values_list(
+                'id', 'specialty', 'years_of_experience', 'sentiment_score',
+                'rating_stats__rating_sum', 'rating_stats__rating_count'
+            ))
+        else:
+            doctors = list(doctors)
+            # Stats already loaded with select_related/prefetch are reused;
+            # the rest come from a single query
+            missing = [doctor.id for doctor in doctors if not Doctor.rating_stats.is_cached(doctor)]
+            fetched = {
+                stats.doctor_id: stats
+                for stats in DoctorRatingStats.objects.filter(doctor_id__in=missing)
+            } if missing else {}
+
+            rows = []
+            for doctor in doctors:
+                if Doctor.rating_stats.is_cached(doctor):
+                    stats = getattr(doctor, 'rating_stats', None)
+                else:
+                    stats = fetched.get(doctor.id)
+                rows.append((
+                    doctor.id, doctor.specialty, doctor.years_of_experience, doctor.sentiment_score,
+                    stats.rating_sum if stats else 0, stats.rating_count if stats else 0,
+                ))
+
+        ids = [row[0] for row in rows]
+        inputs = {
+            'specialty': [row[1] or '' for row in rows],
+            'years_of_experience': np.array([row[2] or 0 for row in rows], dtype=float),
+            'sentiment_score': np.array([row[3] or 0.0 for row in rows], dtype=float),
+            'rating_sum': np.array([row[4] or 0 for row in rows], dtype=float),
+            'feedback_count': np.array([row[5] or 0 for row in rows], dtype=float),
+        }
+        return ids, inputs
 
-        # Case-insensitive comparison
-        if doctor.specialty.lower() == predicted_specialty.lower():
-            return 100.0
+    @staticmethod
+    def _component_scores(inputs, predicted_specialty, include_sentiment, rating_prior=None):
+        """
+        Component scores (0-100) of every doctor, as arrays
+
+        - rating: Bayesian average rating (5-star scale) mapped to 0-100.
+          The doctor's ratings are combined with prior_weight virtual
+          ratings at the mean of all ratings, so a single 5-star review
+          doesn't outrank hundreds of 4.8s; without ratings it is the mean
+        - experience: linear, 0 years = 0, capped at 20 years = 100
+        - feedback_count: more reviews = more credibility; linear, capped at
+          50 reviews = 100
+        - sentiment: Phase 1 uses the stored doctor.sentiment_score (default
+          0); Phase 3 will derive it from feedback comments. 0 when sentiment
+          is not included
+        - specialty_match: 100 if the doctor's specialty matches the ML
+          prediction (case-insensitive), 0 otherwise
+
+        rating_prior is the (prior_mean, prior_weight) to use, by default
+        get_rating_prior()
+        """
+        prior_mean, prior_weight = rating_prior or get_rating_prior()
+        counts = inputs['feedback_count']
+        weight = prior_weight + counts
+        smoothed_rating = np.divide(
+            prior_weight * prior_mean + inputs['rating_sum'], weight,
+            out=np.full(len(counts), float(prior_mean)), where=weight > 0
+        )
+        rating = smoothed_rating / 5.0 * 100
+        experience = np.minimum(inputs['years_of_experience'] / 20.0 * 100, 100)
+        feedback_count = np.minimum(counts / 50.0 * 100, 100)
+
+        if include_sentiment:
+            sentiment = np.clip(inputs['sentiment_score'], 0, 100)
+        else:
+            sentiment = np.zeros(len(counts))
+
+        if isinstance(predicted_specialty, str):
+            predicted_specialty = [predicted_specialty]
+        predicted = {specialty.lower() for specialty in predicted_specialty or ()}
+        specialty_match = np.array(
+            [100.0 if specialty.lower() in predicted else 0.0 for specialty in inputs['specialty']],
+            dtype=float
+        )
 
-        return 0.0
+        return {
+            'rating': rating,
+            'experience': experience,
+            'feedback_count': feedback_count,
+            'sentiment': sentiment,
+            'specialty_match': specialty_match,
+        }
 
     @classmethod
     def get_detailed_scores(cls, doctor, predicted_specialty=None, include_sentiment=False):
@@ -179,50 +512,5 @@ class DoctorRankingService:
         Returns:
             dict: Breakdown of all scoring components
         """
-        weights = cls.FUTURE_WEIGHTS if include_sentiment else cls.DEFAULT_WEIGHTS
-
-        rating_score = cls._calculate_rating_score(doctor)
-        experience_score = cls._calculate_experience_score(doctor)
-        feedback_score = cls._calculate_feedback_count_score(doctor)
-        sentiment_score = cls._calculate_sentiment_score(doctor) if include_sentiment else 0
-        specialty_score = cls._calculate_specialty_match_score(doctor, predicted_specialty)
-
-        total_score = (
-            rating_score * weights['rating'] +
-            experience_score * weights['experience'] +
-            feedback_score * weights['feedback_count'] +
-            sentiment_score * weights['sentiment'] +
-            specialty_score * weights['specialty_match']
-        )
-
-        return {
-            'total_score': round(total_score, 2),
-            'components': {
-                'rating': {
-                    'raw_score': round(rating_score, 2),
-                    'weight': weights['rating'],
-                    'weighted_score': round(rating_score * weights['rating'], 2)
-                },
-                'experience': {
-                    'raw_score': round(experience_score, 2),
-                    'weight': weights['experience'],
-                    'weighted_score': round(experience_score * weights['experience'], 2)
-                },
-                'feedback_count': {
-                    'raw_score': round(feedback_score, 2),
-                    'weight': weights['feedback_count'],
-                    'weighted_score': round(feedback_score * weights['feedback_count'], 2)
-                },
-                'sentiment': {
-                    'raw_score': round(sentiment_score, 2),
-                    'weight': weights['sentiment'],
-                    'weighted_score': round(sentiment_score * weights['sentiment'], 2)
-                },
-                'specialty_match': {
-                    'raw_score': round(specialty_score, 2),
-                    'weight': weights['specialty_match'],
-                    'weighted_score': round(specialty_score * weights['specialty_match'], 2)
-                }
-            },
-            'weights_used': 'future' if include_sentiment else 'default'
-        }
+        details = cls.score_many([doctor], predicted_specialty, include_sentiment=include_sentiment, detailed=True)
+        return details[doctor.id]
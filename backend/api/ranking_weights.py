@@ -0,0 +1,122 @@
+"""
+Ranking Weight Profiles
+Resolves which RankingWeightProfile ranks a request: the one named in the
+request, else the A/B cohort of the patient, else the default profile.
+
+Active profiles are cached in each process and reloaded when the profile
+version in the Django cache changes; every profile save or delete bumps it
+(api/signals.py). With a per-process cache backend (the default locmem
+cache) other processes only see a change once RANKING_WEIGHTS_CACHE_TTL
+expires, so use a shared cache (Redis, Memcached) to apply changes at once.
+"""
+import hashlib
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+
+WEIGHT_PROFILES_VERSION_KEY = 'ranking:weight_profiles_version'
+
+_profiles = None
+_default_profile = None
+_profiles_version = None
+_profiles_loaded_at = 0.0
+_profiles_lock = threading.Lock()
+
+
+def invalidate_weight_profiles():
+    """Make every process reload the profiles on their next lookup"""
+    global _profiles
+    cache.set(WEIGHT_PROFILES_VERSION_KEY, uuid.uuid4().hex, None)
+    with _profiles_lock:
+        _profiles = None
+
+
+def _current_version():
+    version = cache.get(WEIGHT_PROFILES_VERSION_KEY)
+    if version is None:
+        # Evicted or never set: start a new version (add() keeps a version
+        # another process may have set meanwhile)
+        cache.add(WEIGHT_PROFILES_VERSION_KEY, uuid.uuid4().hex, None)
+        version = cache.get(WEIGHT_PROFILES_VERSION_KEY)
+    return version
+
+
+def _built_in_default():
+    # Used until a default profile is created
+    from api.models import RankingWeightProfile
+    from api.ranking_service import DoctorRankingService
+
+    return RankingWeightProfile(name='default', is_default=True, **DoctorRankingService.DEFAULT_WEIGHTS)
+
+
+def _load_profiles():
+    """
+    Active profiles, loaded with one query and cached until the profile
+    version changes
+
+    Returns:
+        (profiles, default): dict of profile name -> RankingWeightProfile,
+        and the default profile
+    """
+    global _profiles, _default_profile, _profiles_version, _profiles_loaded_at
+    from api.models import RankingWeightProfile
+
+    version = _current_version()
+    with _profiles_lock:
+        if (_profiles is not None and _profiles_version == version
+                and time.monotonic() - _profiles_loaded_at < settings.RANKING_WEIGHTS_CACHE_TTL):
+            return _profiles, _default_profile
+
+    profiles = {profile.name: profile for profile in RankingWeightProfile.objects.filter(is_active=True)}
+    default = next((profile for profile in profiles.values() if profile.is_default), None)
+    if default is None:
+        default = _built_in_default()
+        profiles.setdefault(default.name, default)
+
+    with _profiles_lock:
+        _profiles, _default_profile = profiles, default
+        _profiles_version, _profiles_loaded_at = version, time.monotonic()
+    return profiles, default
+
+
+def get_default_profile():
+    """The profile the stored Doctor.ranking_score is computed with"""
+    return _load_profiles()[1]
+
+
+def get_weight_profile(name=None, cohort_key=None):
+    """
+    The weight profile that ranks a request
+
+    Args:
+        name: profile explicitly selected by the request (optional)
+        cohort_key: stable id (e.g. the patient id) used to assign an A/B
+            cohort; the same key always gets the same profile while the
+            cohort shares don't change
+
+    Returns:
+        RankingWeightProfile
+
+    Raises:
+        ValueError: unknown or inactive profile name
+    """
+    profiles, default = _load_profiles()
+    if name:
+        if name not in profiles:
+            raise ValueError(f"Unknown weight profile '{name}'")
+        return profiles[name]
+
+    if cohort_key is not None:
+        cohorts = [profile for profile in profiles.values() if profile.cohort_share > 0]
+        total_share = sum(profile.cohort_share for profile in cohorts)
+        if total_share:
+            bucket = int(hashlib.sha256(str(cohort_key).encode()).hexdigest(), 16) % total_share
+            for profile in cohorts:
+                if bucket < profile.cohort_share:
+                    return profile
+                bucket -= profile.cohort_share
+
+    return default
@@ -0,0 +1,128 @@
+"""
+Doctor Rating Stats
+Incremental maintenance of the denormalized DoctorRatingStats rows, so
+ranking reads a doctor's average rating and feedback count from one row
+instead of aggregating the Feedback table
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Avg, Count, F, FloatField, Sum
+from django.db.models.functions import Cast, NullIf
+from django.utils import timezone
+
+RATING_PRIOR_CACHE_KEY = 'ranking:rating_prior_mean'
+
+# Prior mean while there is no feedback at all (the middle of the 5-star scale)
+NEUTRAL_RATING = 2.5
+
+
+def apply_rating_change(doctor_id, rating_delta, count_delta):
+    """
+    Add rating_delta to a doctor's rating sum and count_delta to the rating
+    count, recomputing the average in the same UPDATE (safe under
+    concurrent feedback writes)
+    """
+    from api.models import DoctorRatingStats
+
+    if not doctor_id or (rating_delta == 0 and count_delta == 0):
+        return
+
+    # Every right-hand side below sees the row as it was before the update
+    changes = {
+        'rating_sum': F('rating_sum') + rating_delta,
+        'rating_count': F('rating_count') + count_delta,
+        'avg_rating': (
+            Cast(F('rating_sum') + rating_delta, FloatField()) /
+            NullIf(F('rating_count') + count_delta, 0)
+        ),
+        'updated_at': timezone.now(),
+    }
+
+    stats = DoctorRatingStats.objects.filter(doctor_id=doctor_id)
+    # Only a new rating creates the row; removals never do (a missing row
+    # has nothing to subtract, and the doctor may be being deleted)
+    if not stats.update(**changes) and count_delta > 0:
+        DoctorRatingStats.objects.get_or_create(doctor_id=doctor_id)
+        stats.update(**changes)
+
+
+def get_rating_stats(doctor):
+    """
+    Returns:
+        (avg_rating, rating_count): avg_rating is None without feedback
+    """
+    from api.models import DoctorRatingStats
+
+    try:
+        stats = doctor.rating_stats
+    except DoctorRatingStats.DoesNotExist:
+        return None, 0
+    if not stats.rating_count:
+        return None, 0
+    return stats.avg_rating, stats.rating_count
+
+
+def get_rating_prior():
+    """
+    Prior of the Bayesian-smoothed doctor rating: the mean of every feedback
+    rating, from one aggregate over DoctorRatingStats cached for
+    RANKING_RATING_PRIOR_TTL seconds, and its weight (in reviews)
+
+    Returns:
+        (prior_mean, prior_weight)
+    """
+    from api.models import DoctorRatingStats
+
+    prior_mean = cache.get(RATING_PRIOR_CACHE_KEY)
+    if prior_mean is None:
+        totals = DoctorRatingStats.objects.aggregate(rating_sum=Sum('rating_sum'), rating_count=Sum('rating_count'))
+        if totals['rating_count']:
+            prior_mean = totals['rating_sum'] / totals['rating_count']
+        else:
+            prior_mean = NEUTRAL_RATING
+        cache.set(RATING_PRIOR_CACHE_KEY, prior_mean, settings.RANKING_RATING_PRIOR_TTL)
+    return prior_mean, settings.RANKING_RATING_PRIOR_WEIGHT
+
+
+def rebuild_rating_stats():
+    """
+    Recompute every doctor's stats from the Feedback table in one aggregate
+    query (for bulk changes that bypass the signals, e.g. QuerySet.update),
+    then every stored ranking score from them
+
+    Returns:
+        int: number of doctors with feedback
+    """
+    from api.models import DoctorRatingStats, Feedback
+
+    totals = (
+        Feedback.objects.order_by()
+        .values('doctor_id')
+        .annotate(rating_sum=Sum('rating'), rating_count=Count('id'), avg_rating=Avg('rating'))
+    )
+    now = timezone.now()
+    rows = [
+        DoctorRatingStats(
+            doctor_id=row['doctor_id'],
+            rating_sum=row['rating_sum'],
+            rating_count=row['rating_count'],
+            avg_rating=float(row['avg_rating']),
+            updated_at=now,
+        )
+        for row in totals
+    ]
+
+    with transaction.atomic():
+        DoctorRatingStats.objects.exclude(doctor_id__in=[row.doctor_id for row in rows]).delete()
+        DoctorRatingStats.objects.bulk_create(
+            rows,
+            update_conflicts=True,
+            unique_fields=['doctor'],
+            update_fields=['rating_sum', 'rating_count', 'avg_rating', 'updated_at'],
+        )
+    cache.delete(RATING_PRIOR_CACHE_KEY)
+
+    from api.ranking_service import DoctorRankingService
+    DoctorRankingService.refresh_stored_scores()
+    return len(rows)
@@ -1,11 +1,84 @@
 from rest_framework import serializers
-from .models import Doctor, Patient, Appointment, Feedback, FeedbackMessage, MedicalDocument, Symptom, Notification, HospitalLocation, AppointmentSlot, Message, DoctorPricing, DoctorBankAccount, PatientPaymentMethod, Transaction, PaymentRequest
+from .models import Doctor, Patient, Appointment, Feedback, FeedbackMessage, MedicalDocument, Symptom, SymptomPrediction, Notification, HospitalLocation, AppointmentSlot, Message, DoctorPricing, DoctorBankAccount, PatientPaymentMethod, Transaction, PaymentRequest
 import base64
 import uuid
 from django.core.files.base import ContentFile
 
 
-class DoctorSerializer(serializers.ModelSerializer):
+class DoctorRankingFieldsMixin:
+    """
+    Rating, ranking and pricing values shared by the doctor serializers, read
+    from the doctor query's annotations and select_related rows when present,
+    plus distance_km in nearby searches
+    """
+
+    def get_pricing(self, obj):
+        """The doctor's DoctorPricing, or None"""
+        if Doctor.pricing.is_cached(obj):
+            # Loaded with select_related('pricing') (None when there is none)
+            return getattr(obj, 'pricing', None)
+        return DoctorPricing.objects.filter(doctor=obj).first()
+
+    def get_avg_rating(self, obj):
+        """Calculate average rating from feedback"""
+        if hasattr(obj, 'annotated_avg_rating'):
+            # Already computed by DoctorRankingService.annotate_scores
+            avg_rating = obj.annotated_avg_rating
+        else:
+            from api.rating_stats import get_rating_stats
+            avg_rating, _ = get_rating_stats(obj)
+        return round(avg_rating, 2) if avg_rating else None
+
+    def get_total_feedback(self, obj):
+        """Get total count of feedback/reviews"""
+        if hasattr(obj, 'annotated_feedback_count'):
+            return obj.annotated_feedback_count
+        from api.rating_stats import get_rating_stats
+        _, feedback_count = get_rating_stats(obj)
+        return feedback_count
+
+    def get_ranking_score(self, obj):
+        """Calculate composite ranking score using DoctorRankingService"""
+        from api.ranking_service import DoctorRankingService
+
+        # Score computed in the doctor query (same predicted specialty)
+        if hasattr(obj, 'annotated_ranking_score'):
+            return obj.annotated_ranking_score
+
+        # Get predicted specialty and weight profile from context if available
+        predicted_specialty = self.context.get('predicted_specialty')
+        profile = self.context.get('weight_profile')
+
+        if profile is not None and not profile.is_default:
+            return DoctorRankingService.calculate_score(
+                doctor=obj,
+                predicted_specialty=predicted_specialty,
+                weights=profile.weights,
+                include_sentiment=profile.includes_sentiment
+            )
+
+        # Stored score, kept current for the doctor's own specialty
+        if (obj.ranking_updated_at is not None and predicted_specialty
+                and obj.specialty.lower() == predicted_specialty.lower()):
+            return obj.ranking_score
+
+        # Calculate ranking score
+        score = DoctorRankingService.calculate_score(
+            doctor=obj,
+            predicted_specialty=predicted_specialty
+        )
+
+        return score
+
+    def to_representation(self, instance):
+        representation = super().to_representation(instance)
+        # Nearby search (api.geo.filter_near): km to the doctor's nearest location
+        if getattr(instance, 'distance_km', None) is not None:
+            representation['distance_km'] = round(instance.distance_km, 2)
+        return representation
+
+
+class DoctorSerializer(DoctorRankingFieldsMixin, serializers.ModelSerializer):
     # Add SerializerMethodFields for document URLs
     national_id_url = serializers.SerializerMethodField()
     medical_degree_url = serializers.SerializerMethodField()
@@ -25,9 +98,28 @@ class DoctorSerializer(serializers.ModelSerializer):
         model = Doctor
         fields = '__all__'
         extra_kwargs = {'password': {'write_only': True}}
-    
+
+    @staticmethod
+    def prepare_queryset(queryset):
+        """
+        Load everything the serializer reads per doctor (pricing, rating
+        stats, bank account check) with the doctor query itself, so listing
+        doctors takes the same number of queries for any number of doctors
+        """
+        from django.db.models import Exists, OuterRef
+
+        queryset = queryset.select_related('pricing', 'rating_stats')
+        if 'has_bank_account' not in queryset.query.annotations:
+            queryset = queryset.annotate(
+                has_bank_account=Exists(DoctorBankAccount.objects.filter(doctor=OuterRef('pk')))
+            )
+        return queryset
+
     def get_has_bank_account(self, obj):
         """Check if doctor has at least one bank account"""
+        if hasattr(obj, 'has_bank_account'):
+            # Annotated by prepare_queryset / DoctorViewSet.get_queryset
+            return obj.has_bank_account
         from .models import DoctorBankAccount
         return DoctorBankAccount.objects.filter(doctor=obj).exists()
 
@@ -90,8 +182,7 @@ class DoctorSerializer(serializers.ModelSerializer):
 
         # Include pricing details if a DoctorPricing record exists
         try:
-            from .models import DoctorPricing
-            pricing = DoctorPricing.objects.filter(doctor=instance).first()
+            pricing = self.get_pricing(instance)
             if pricing:
                 representation['online_consultation_fee'] = float(pricing.online_fee)
                 representation['in_person_consultation_fee'] = float(pricing.in_person_fee)
@@ -132,30 +223,98 @@ class DoctorSerializer(serializers.ModelSerializer):
 
         return super().to_internal_value(data)
 
-    def get_avg_rating(self, obj):
-        """Calculate average rating from feedback"""
-        from django.db.models import Avg
-        result = Feedback.objects.filter(doctor=obj).aggregate(avg_rating=Avg('rating'))
-        return round(result['avg_rating'], 2) if result['avg_rating'] else None
 
-    def get_total_feedback(self, obj):
-        """Get total count of feedback/reviews"""
-        return Feedback.objects.filter(doctor=obj).count()
+class DoctorDirectorySerializer(DoctorRankingFieldsMixin, serializers.ModelSerializer):
+    """
+    Compact doctor card for the patient-facing directory: what the search
+    grid shows, without credential documents, account settings or the
+    password hash
 
-    def get_ranking_score(self, obj):
-        """Calculate composite ranking score using DoctorRankingService"""
-        from api.ranking_service import DoctorRankingService
+    Supports sparse fieldsets: with a 'fields' list in the context only
+    those fields are serialized, and prepare_queryset() loads only the
+    columns they need.
+    """
+    avg_rating = serializers.SerializerMethodField()
+    total_feedback = serializers.SerializerMethodField()
+    ranking_score = serializers.SerializerMethodField()
+    online_consultation_fee = serializers.SerializerMethodField()
+    in_person_consultation_fee = serializers.SerializerMethodField()
 
-        # Get predicted specialty from context if available
-        predicted_specialty = self.context.get('predicted_specialty')
+    class Meta:
+        model = Doctor
+        fields = [
+            'id', 'first_name', 'middle_name', 'last_name', 'specialty', 'years_of_experience',
+            'avatar', 'bio', 'phone', 'email', 'license_number', 'appointment_interval',
+            'approval_status', 'is_verified', 'avg_rating', 'total_feedback', 'ranking_score',
+            'online_consultation_fee', 'in_person_consultation_fee',
+        ]
 
-        # Calculate ranking score
-        score = DoctorRankingService.calculate_score(
-            doctor=obj,
-            predicted_specialty=predicted_specialty
-        )
+    # Doctor columns and select_related relations read by the computed fields
+    COMPUTED_FIELD_COLUMNS = {
+        'avg_rating': [],
+        'total_feedback': [],
+        'ranking_score': ['specialty', 'years_of_experience', 'sentiment_score', 'ranking_score', 'ranking_updated_at'],
+        'online_consultation_fee': [],
+        'in_person_consultation_fee': [],
+    }
+    COMPUTED_FIELD_RELATIONS = {
+        'avg_rating': 'rating_stats',
+        'total_feedback': 'rating_stats',
+        'ranking_score': 'rating_stats',
+        'online_consultation_fee': 'pricing',
+        'in_person_consultation_fee': 'pricing',
+    }
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        fields = self.context.get('fields')
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+    @classmethod
+    def parse_fields(cls, value):
+        """
+        Validate a comma-separated ?fields= parameter
+
+        Raises:
+            ValueError: unknown field
+        """
+        fields = [name.strip() for name in value.split(',') if name.strip()]
+        unknown = [name for name in fields if name not in cls.Meta.fields]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}. Available: {', '.join(cls.Meta.fields)}")
+        if 'id' not in fields:
+            fields.insert(0, 'id')
+        return fields
+
+    @classmethod
+    def prepare_queryset(cls, queryset, fields=None):
+        """Select only the doctor columns and related rows the (requested) fields read"""
+        columns, relations = set(), set()
+        for name in fields or cls.Meta.fields:
+            columns.update(cls.COMPUTED_FIELD_COLUMNS.get(name, [name]))
+            if name in cls.COMPUTED_FIELD_RELATIONS:
+                relations.add(cls.COMPUTED_FIELD_RELATIONS[name])
+        if relations:
+            queryset = queryset.select_related(*sorted(relations))
+        return queryset.only(*columns)
+
+    def get_online_consultation_fee(self, obj):
+        pricing = self.get_pricing(obj)
+        return float(pricing.online_fee) if pricing else None
+
+    def get_in_person_consultation_fee(self, obj):
+        pricing = self.get_pricing(obj)
+        return float(pricing.in_person_fee) if pricing else None
 
-        return score
+    def to_representation(self, instance):
+        representation = super().to_representation(instance)
+
+        request = self.context.get('request')
+        if request and representation.get('avatar') and instance.avatar:
+            representation['avatar'] = request.build_absolute_uri(instance.avatar.url)
+        return representation
 
 
 class PatientSerializer(serializers.ModelSerializer):
@@ -370,6 +529,12 @@ class SymptomSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
+class SymptomPredictionSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = SymptomPrediction
+        exclude = ['symptoms_key']
+
+
 class NotificationSerializer(serializers.ModelSerializer):
     class Meta:
         model = Notification
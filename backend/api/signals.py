@@ -0,0 +1,133 @@
+"""
+Model signals
+Keeps DoctorRatingStats in step with every Feedback create, rating change
+and delete, and the stored doctor ranking scores in step with the inputs
+and weight profile they are computed from
+"""
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.migrations.executor import MigrationExecutor
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_migrate, post_save, pre_save
+from django.dispatch import receiver
+
+from api.models import Doctor, Feedback, RankingWeightProfile
+from api.ranking_service import DoctorRankingService
+from api.ranking_weights import invalidate_weight_profiles
+from api.rating_stats import RATING_PRIOR_CACHE_KEY, apply_rating_change
+
+# Doctor fields the stored ranking score depends on
+RANKING_INPUT_FIELDS = {'specialty', 'years_of_experience', 'sentiment_score'}
+
+
+def refresh_ranking(*doctor_ids):
+    DoctorRankingService.refresh_stored_scores(Doctor.objects.filter(id__in=doctor_ids))
+
+
+def _ratings_changed(*doctor_ids):
+    refresh_ranking(*doctor_ids)
+
+    # The change also moved the rating prior every stored score embeds;
+    # re-read it after commit and refresh the scores it has drifted from
+    def apply():
+        cache.delete(RATING_PRIOR_CACHE_KEY)
+        DoctorRankingService.refresh_prior_drift()
+    transaction.on_commit(apply)
+
+
+@receiver(pre_save, sender=Feedback)
+def remember_previous_rating(sender, instance, raw=False, **kwargs):
+    """Remember the stored doctor and rating so post_save can apply the difference"""
+    if raw:
+        return
+    instance._previous_rating = (
+        Feedback.objects.filter(pk=instance.pk).values_list('doctor_id', 'rating').first()
+        if instance.pk else None
+    )
+
+
+@receiver(post_save, sender=Feedback)
+def update_rating_stats_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+
+    previous = getattr(instance, '_previous_rating', None)
+    if previous is None:
+        apply_rating_change(instance.doctor_id, instance.rating, 1)
+        _ratings_changed(instance.doctor_id)
+        return
+
+    previous_doctor_id, previous_rating = previous
+    if previous_doctor_id == instance.doctor_id:
+        if instance.rating != previous_rating:
+            apply_rating_change(instance.doctor_id, instance.rating - previous_rating, 0)
+            _ratings_changed(instance.doctor_id)
+    else:
+        apply_rating_change(previous_doctor_id, -previous_rating, -1)
+        apply_rating_change(instance.doctor_id, instance.rating, 1)
+        _ratings_changed(previous_doctor_id, instance.doctor_id)
+
+
+@receiver(post_delete, sender=Feedback)
+def update_rating_stats_on_delete(sender, instance, **kwargs):
+    apply_rating_change(instance.doctor_id, -instance.rating, -1)
+    _ratings_changed(instance.doctor_id)
+
+
+@receiver(post_save, sender=Doctor)
+def update_ranking_on_doctor_save(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    if update_fields is not None and not RANKING_INPUT_FIELDS.intersection(update_fields):
+        return
+    refresh_ranking(instance.id)
+
+
+@receiver(pre_save, sender=RankingWeightProfile)
+def remember_previous_default(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    instance._was_default = bool(instance.pk) and RankingWeightProfile.objects.filter(
+        pk=instance.pk, is_default=True, is_active=True
+    ).exists()
+
+
+def _weight_profiles_changed(instance):
+    # After commit, so no process can reload the profiles before the change
+    # is visible; stored scores follow the default profile
+    def apply():
+        invalidate_weight_profiles()
+        if instance.is_default or getattr(instance, '_was_default', False):
+            DoctorRankingService.refresh_stored_scores()
+    transaction.on_commit(apply)
+
+
+@receiver(post_save, sender=RankingWeightProfile)
+def update_ranking_on_profile_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    _weight_profiles_changed(instance)
+
+
+@receiver(post_delete, sender=RankingWeightProfile)
+def update_ranking_on_profile_delete(sender, instance, **kwargs):
+    _weight_profiles_changed(instance)
+
+
+@receiver(post_migrate)
+def score_unranked_doctors(sender, **kwargs):
+    """
+    Give doctors that existed before the stored ranking (or the rating prior
+    recorded with it) was added their first score
+    """
+    if sender.name != 'api':
+        return
+
+    # After a partial migrate (e.g. migrate api 0005, or a rollback) the
+    # doctors table lags behind the Doctor model and can't be queried with it
+    executor = MigrationExecutor(connections[kwargs.get('using', DEFAULT_DB_ALIAS)])
+    if executor.migration_plan(executor.loader.graph.leaf_nodes()):
+        return
+    DoctorRankingService.refresh_stored_scores(
+        Doctor.objects.filter(Q(ranking_updated_at__isnull=True) | Q(ranking_rating_prior__isnull=True))
+    )
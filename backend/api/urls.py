@@ -98,7 +98,7 @@ from .views import (
     # Email availability check
     check_email,
 )
-from .ml_predict import predict_specialist
+from .ml_predict import predict_specialist, predict_specialist_async, predict_specialist_stats
 
 router = DefaultRouter()
 router.register(r'doctors', DoctorViewSet, basename='doctor')
@@ -224,6 +224,8 @@ urlpatterns = [
     # ML SPECIALIST PREDICTION
     # ========================
     path('predict-specialist/', predict_specialist, name='predict-specialist'),
+    path('predict-specialist/async/', predict_specialist_async, name='predict-specialist-async'),
+    path('predict-specialist/stats/', predict_specialist_stats, name='predict-specialist-stats'),
 
     # ========================
     # ROUTER URLS (EXISTING)
@@ -5,9 +5,12 @@ from django.db.models import Count, Avg, Q
 from django.utils import timezone
 from django.contrib.auth.hashers import make_password, check_password
 from datetime import date, timedelta
+from .doctor_search import search_doctors
+from .geo import filter_near, parse_near
+from .pagination import AppointmentKeysetPagination, CreatedAtKeysetPagination, MessageKeysetPagination
 from .models import Doctor, Patient, Appointment, Feedback, MedicalDocument, Symptom, Notification, AppointmentSlot, Message, FeedbackMessage, DoctorBlockingAuditLog, AdminUser, DoctorPricing, DoctorBankAccount, PatientPaymentMethod, Transaction, PaymentRequest
 from .serializers import (
-    DoctorSerializer, PatientSerializer,
+    DoctorSerializer, DoctorDirectorySerializer, PatientSerializer,
     AppointmentSerializer, FeedbackSerializer, MedicalDocumentSerializer, SymptomSerializer, NotificationSerializer, MessageSerializer, FeedbackMessageSerializer, DoctorPricingSerializer, DoctorBankAccountSerializer, PatientPaymentMethodSerializer, TransactionSerializer, PaymentRequestSerializer
 )
 
@@ -450,10 +453,41 @@ def patient_change_password(request):
 class DoctorViewSet(viewsets.ModelViewSet):
     serializer_class = DoctorSerializer
 
+    def get_list_fields(self):
+        """
+        Fields of the compact directory listing, requested with
+        ?compact=true (all card fields) or ?fields=a,b,c (sparse fieldset);
+        None when the full DoctorSerializer is used
+        """
+        if self.action != 'list':
+            return None
+        fields = self.request.query_params.get('fields')
+        if fields:
+            from rest_framework.exceptions import ValidationError
+            try:
+                return DoctorDirectorySerializer.parse_fields(fields)
+            except ValueError as e:
+                raise ValidationError({'error': str(e)})
+        if self.request.query_params.get('compact', '').lower() in ('1', 'true'):
+            return list(DoctorDirectorySerializer.Meta.fields)
+        return None
+
+    def get_serializer_class(self):
+        if self.get_list_fields() is not None:
+            return DoctorDirectorySerializer
+        return DoctorSerializer
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['fields'] = self.get_list_fields()
+        return context
+
     def get_queryset(self):
         """
         Filter queryset based on the action:
         - For list view (patient search): Only show approved, non-blocked doctors with bank accounts AND pricing set
+          (compact listings load only the columns of the requested fields), matching ?search= when given;
+          ?near=lat,lng&radius=km keeps the doctors practising nearby, nearest first
         - For retrieve/update/delete: Allow doctor to access their own data even if blocked
         """
         if self.action == 'list':
@@ -470,16 +504,34 @@ class DoctorViewSet(viewsets.ModelViewSet):
                 in_person_fee__gt=0
             )
             
-            return Doctor.objects.filter(
+            doctors = Doctor.objects.filter(
                 is_blocked=False, 
                 approval_status='approved'
             ).annotate(
                 has_bank_account=Exists(has_bank),
                 has_pricing_set=Exists(has_pricing)
-            ).filter(has_bank_account=True, has_pricing_set=True).select_related('pricing')
+            ).filter(has_bank_account=True, has_pricing_set=True)
+
+            search = self.request.query_params.get('search', '')
+            if search:
+                doctors = search_doctors(doctors, search)
+
+            near = self.request.query_params.get('near')
+            if near:
+                from rest_framework.exceptions import ValidationError
+                try:
+                    latitude, longitude, radius_km = parse_near(near, self.request.query_params.get('radius'))
+                except ValueError as e:
+                    raise ValidationError({'error': str(e)})
+                doctors = filter_near(doctors, latitude, longitude, radius_km).order_by('distance_km', 'id')
+
+            list_fields = self.get_list_fields()
+            if list_fields is not None:
+                return DoctorDirectorySerializer.prepare_queryset(doctors, list_fields)
+            return DoctorSerializer.prepare_queryset(doctors)
         else:
             # Doctor accessing their own data: show all (including blocked)
-            return Doctor.objects.all().select_related('pricing')
+            return DoctorSerializer.prepare_queryset(Doctor.objects.all())
 
     def update(self, request, *args, **kwargs):
         """Override update to clean up old avatar and document files"""
@@ -715,10 +767,19 @@ class DoctorViewSet(viewsets.ModelViewSet):
         Get ranked doctors filtered by specialty
         Query params:
         - specialty: Required. The specialty to filter by
+        - limit: Optional. Page size (max 100)
+        - cursor: Optional. next_cursor of the previous page
+        - weight_profile: Optional. Name of the ranking weight profile
+        - patient_id: Optional. Assigns the patient's A/B cohort profile
+        - near: Optional. "latitude,longitude"; only doctors with a hospital location within radius,
+          nearest first (then by ranking score), each with distance_km
+        - radius: Optional. Search radius in km for near
 
         Returns ALL approved and non-blocked doctors sorted by ranking score (rating, experience, feedback count)
+        With limit, returns {"results": [...], "next_cursor": ...} instead, one page at a time
         """
         from api.ranking_service import DoctorRankingService
+        from api.ranking_weights import get_weight_profile
 
         specialty = request.query_params.get('specialty')
 
@@ -728,33 +789,54 @@ class DoctorViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        # Filter doctors by specialty (case-insensitive), approved and non-blocked
-        doctors = Doctor.objects.filter(
-            specialty__iexact=specialty,
-            approval_status='approved',
-            is_blocked=False
+        try:
+            limit, position = DoctorRankingService.parse_page_params(
+                request.query_params.get('limit'),
+                request.query_params.get('cursor')
+            )
+            # Named weight profile, else the patient's A/B cohort, else the default
+            profile = get_weight_profile(
+                request.query_params.get('weight_profile'),
+                request.query_params.get('patient_id')
+            )
+            near = request.query_params.get('near')
+            if near:
+                latitude, longitude, radius_km = parse_near(near, request.query_params.get('radius'))
+            # Cursors of nearby listings carry the distance as well
+            if position is not None and (len(position) == 3) != bool(near):
+                raise ValueError('Invalid cursor')
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Filter doctors by specialty (case-insensitive), approved and non-blocked,
+        # sorted by ranking score (highest first)
+        doctors_ranked = DoctorRankingService.rank_for_specialties(
+            DoctorSerializer.prepare_queryset(Doctor.objects.filter(
+                specialty__iexact=specialty,
+                approval_status='approved',
+                is_blocked=False
+            )),
+            [specialty],
+            profile
         )
-
-        # Calculate ranking scores for each doctor
-        doctor_scores = []
-        for doctor in doctors:
-            score = DoctorRankingService.calculate_score(
-                doctor=doctor,
-                predicted_specialty=specialty  # Bonus for matching specialty
+        if near:
+            doctors_ranked = filter_near(doctors_ranked, latitude, longitude, radius_km).order_by(
+                'distance_km', '-annotated_ranking_score', 'id'
             )
-            doctor_scores.append((doctor, score))
 
-        # Sort by ranking score (highest first) - return all doctors
-        doctor_scores.sort(key=lambda x: x[1], reverse=True)
+        next_cursor = None
+        if limit is not None:
+            doctors_ranked, next_cursor = DoctorRankingService.paginate(doctors_ranked, limit, position)
 
         # Serialize all doctors with predicted_specialty in context for ranking
-        doctors_ranked = [doctor for doctor, score in doctor_scores]
         serializer = self.get_serializer(
             doctors_ranked,
             many=True,
-            context={'request': request, 'predicted_specialty': specialty}
+            context={'request': request, 'predicted_specialty': specialty, 'weight_profile': profile}
         )
 
+        if limit is not None:
+            return Response({'results': serializer.data, 'next_cursor': next_cursor})
         return Response(serializer.data)
 
     @action(detail=True, methods=['get', 'post'])
@@ -1123,6 +1205,17 @@ class PatientViewSet(viewsets.ModelViewSet):
         serializer = SymptomSerializer(symptoms, many=True)
         return Response(serializer.data)
 
+    @action(detail=True, methods=['get'])
+    def predictions(self, request, pk=None):
+        """Get stored specialist predictions for a patient, newest first"""
+        from .models import SymptomPrediction
+        from .serializers import SymptomPredictionSerializer
+
+        patient = self.get_object()
+        predictions = SymptomPrediction.objects.filter(patient=patient)
+        serializer = SymptomPredictionSerializer(predictions, many=True)
+        return Response(serializer.data)
+
     @action(detail=True, methods=['post'])
     def submit_symptom(self, request, pk=None):
         """Submit a symptom"""
@@ -1149,6 +1242,7 @@ class PatientViewSet(viewsets.ModelViewSet):
 class AppointmentViewSet(viewsets.ModelViewSet):
     queryset = Appointment.objects.all().select_related('patient', 'doctor', 'location')
     serializer_class = AppointmentSerializer
+    pagination_class = AppointmentKeysetPagination
 
     def get_queryset(self):
         """Filter appointments by query parameters"""
@@ -1578,6 +1672,7 @@ def delete_feedback_message(request, message_id):
 class NotificationViewSet(viewsets.ModelViewSet):
     queryset = Notification.objects.all()
     serializer_class = NotificationSerializer
+    pagination_class = CreatedAtKeysetPagination
 
     @action(detail=False, methods=['get'])
     def for_user(self, request):
@@ -1617,6 +1712,7 @@ class NotificationViewSet(viewsets.ModelViewSet):
 class MessageViewSet(viewsets.ModelViewSet):
     queryset = Message.objects.all()
     serializer_class = MessageSerializer
+    pagination_class = MessageKeysetPagination
 
     def get_serializer_context(self):
         """Add request to serializer context for URL building"""
@@ -2118,20 +2214,21 @@ class AdminDoctorListAPIView(generics.ListAPIView):
     permission_classes = [IsAuthenticated]
     authentication_classes = [TokenAuthentication]
     serializer_class = DoctorListSerializer
+    pagination_class = CreatedAtKeysetPagination
     
+    def get_keyset_ordering(self, queryset, ordering):
+        # Searches page through the results best match first
+        if 'search_rank' in queryset.query.annotations:
+            return ('-search_rank',) + ordering
+        return ordering
+
     def get_queryset(self):
         queryset = Doctor.objects.all().order_by('-created_at')
         
-        # Search
+        # Search (best matches first)
         search = self.request.query_params.get('search', '')
         if search:
-            queryset = queryset.filter(
-                Q(first_name__icontains=search) |
-                Q(last_name__icontains=search) |
-                Q(email__icontains=search) |
-                Q(specialty__icontains=search) |
-                Q(phone__icontains=search)
-            )
+            queryset = search_doctors(queryset, search)
         
         # Filter by specialization
         specialty = self.request.query_params.get('specialty', '')
@@ -2247,6 +2344,7 @@ class AdminPatientListAPIView(generics.ListAPIView):
     permission_classes = [IsAuthenticated]
     authentication_classes = [TokenAuthentication]
     serializer_class = PatientListSerializer
+    pagination_class = CreatedAtKeysetPagination
     
     def get_queryset(self):
         queryset = Patient.objects.all().order_by('-created_at')
@@ -2388,6 +2486,7 @@ class AdminAppointmentListAPIView(generics.ListAPIView):
     permission_classes = [IsAuthenticated]
     authentication_classes = [TokenAuthentication]
     serializer_class = AppointmentListSerializer
+    pagination_class = AppointmentKeysetPagination
     
     def get_queryset(self):
         queryset = Appointment.objects.select_related(
@@ -2551,12 +2650,7 @@ class AdminSearchDoctorsAPIView(APIView):
     
     def get(self, request):
         query = request.query_params.get('q', '')
-        doctors = Doctor.objects.filter(
-            Q(first_name__icontains=query) |
-            Q(last_name__icontains=query) |
-            Q(email__icontains=query) |
-            Q(specialty__icontains=query)
-        )[:10]
+        doctors = search_doctors(Doctor.objects.all(), query)[:10]
         
         serializer = DoctorSearchSerializer(doctors, many=True)
         return Response({'results': serializer.data}, status=status.HTTP_200_OK)
@@ -2647,17 +2741,12 @@ class DoctorApprovalListAPIView(APIView):
         status_filter = request.query_params.get('status', 'pending')
         search_query = request.query_params.get('search', '')
 
-        doctors = Doctor.objects.filter(approval_status=status_filter)
+        doctors = Doctor.objects.filter(approval_status=status_filter).order_by('-created_at')
 
         if search_query:
-            doctors = doctors.filter(
-                Q(first_name__icontains=search_query) |
-                Q(last_name__icontains=search_query) |
-                Q(email__icontains=search_query) |
-                Q(specialty__icontains=search_query)
-            )
+            doctors = search_doctors(doctors, search_query)
 
-        doctors = doctors.order_by('-created_at')
+        doctors = DoctorSerializer.prepare_queryset(doctors)
         serializer = DoctorSerializer(doctors, many=True, context={'request': request})
 
         return Response({
@@ -3607,6 +3696,7 @@ class TransactionViewSet(viewsets.ModelViewSet):
     """ViewSet for transactions"""
     serializer_class = TransactionSerializer
     permission_classes = []  # No authentication required
+    pagination_class = CreatedAtKeysetPagination
     
     def get_queryset(self):
         patient_id = self.request.query_params.get('patient_id')
@@ -0,0 +1,141 @@
+"""
+Benchmark doctor search: icontains chain vs indexed search
+Inserts synthetic doctors (100,000 by default) inside a transaction that is
+rolled back at the end, then times the admin / patient doctor search with
+the previous Q(...__icontains) chain, the full-text match alone and
+api.doctor_search, and shows the plan PostgreSQL picks for each.
+
+Needs migration 0008 applied. Without pg_trgm (no trigram indexes)
+api.doctor_search is the icontains chain, so its row matches that one.
+
+Usage:
+    python benchmark_doctor_search.py [number_of_doctors] [runs_per_query]
+"""
+import os
+import sys
+import time
+import random
+import django
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'healthcare_backend.settings')
+django.setup()
+
+import numpy as np
+from django.db import connection, transaction
+from django.db.models import Q
+
+from api.doctor_search import (
+    SEARCH_FIELDS, doctor_search_vector, has_trigram_indexes, prefix_search_query, search_doctors,
+)
+from api.models import Doctor
+
+N_DOCTORS = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+RUNS = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+PAGE = 20
+
+FIRST_NAMES = ['Amina', 'Bilal', 'Chen', 'Daniela', 'Emeka', 'Farah', 'Gustavo', 'Hana', 'Imran', 'Julia',
+               'Kofi', 'Leila', 'Mateo', 'Nadia', 'Omar', 'Priya', 'Quentin', 'Rania', 'Sami', 'Tariq']
+LAST_NAMES = ['Ahmed', 'Bauer', 'Costa', 'Diallo', 'Eriksen', 'Fernandes', 'Garcia', 'Haddad', 'Ivanova', 'Jensen',
+              'Khan', 'Lopez', 'Mensah', 'Nakamura', 'Okafor', 'Petrov', 'Qureshi', 'Rossi', 'Silva', 'Tanaka']
+SPECIALTIES = ['Cardiologist', 'Dermatologist', 'Neurologist', 'Gastroenterologist', 'Pulmonologist',
+               'Orthopedist', 'Pediatrician', 'Psychiatrist', 'Endocrinologist', 'Urologist']
+
+BATCH_MARKER = 'benchsearch'
+
+
+def create_doctors(n):
+    rng = random.Random(42)
+    doctors = []
+    for i in range(n):
+        first = f"{rng.choice(FIRST_NAMES)}{i % 97 or ''}"
+        last = rng.choice(LAST_NAMES)
+        doctors.append(Doctor(
+            id=f'{BATCH_MARKER}{i}',
+            email=f'{first.lower()}.{last.lower()}{i}@{BATCH_MARKER}.example',
+            password='!',
+            first_name=first,
+            last_name=last,
+            specialty=rng.choice(SPECIALTIES),
+            phone=f'+1555{i:07d}',
+            years_of_experience=rng.randint(0, 40),
+            approval_status='approved',
+        ))
+    Doctor.objects.bulk_create(doctors, batch_size=5000)
+
+
+def icontains_search(text):
+    condition = Q()
+    for field in SEARCH_FIELDS:
+        condition |= Q(**{f'{field}__icontains': text})
+    return Doctor.objects.filter(condition).order_by('-created_at')
+
+
+def fulltext_search(text):
+    return (
+        Doctor.objects
+        .annotate(search_document=doctor_search_vector())
+        .filter(search_document=prefix_search_query(text))
+        .order_by('-created_at')
+    )
+
+
+def indexed_search(text):
+    return search_doctors(Doctor.objects.order_by('-created_at'), text)
+
+
+def time_query(queryset):
+    timings = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        list(queryset[:PAGE].values_list('id', flat=True))
+        timings.append(time.perf_counter() - start)
+    return np.array(timings) * 1000
+
+
+def plan_summary(queryset):
+    plan = queryset[:PAGE].values_list('id', flat=True).explain()
+    scans = [line.strip().lstrip('-> ').split('  ')[0] for line in plan.splitlines() if 'Scan' in line]
+    return '; '.join(dict.fromkeys(scans))
+
+
+QUERIES = [
+    'Cardio',          # specialty prefix
+    'Amina Khan',      # full name
+    'nakamura',        # last name, any case
+    '5550012',         # part of a phone number
+    'farah3.rossi',    # part of an email
+]
+
+
+class Rollback(Exception):
+    pass
+
+
+print("\n" + "="*70)
+print(f"  DOCTOR SEARCH: {N_DOCTORS} synthetic doctors, {RUNS} runs per query, first {PAGE} results")
+print(f"  Trigram indexes: {'present' if has_trigram_indexes() else 'missing (search = icontains chain)'}")
+print("="*70)
+
+try:
+    with transaction.atomic():
+        start = time.perf_counter()
+        create_doctors(N_DOCTORS)
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE doctors')
+        print(f"Inserted in {time.perf_counter() - start:.1f} s\n")
+
+        for text in QUERIES:
+            old, fulltext, new = icontains_search(text), fulltext_search(text), indexed_search(text)
+            old_ids = set(old.values_list('id', flat=True))
+            new_ids = set(new.values_list('id', flat=True))
+
+            print(f"'{text}': {len(old_ids)} icontains matches, {len(new_ids)} search matches"
+                  f"{'' if old_ids <= new_ids else '  ✗ MISSING icontains matches'}")
+            for label, queryset in (('icontains', old), ('full-text', fulltext), ('search', new)):
+                ms = time_query(queryset)
+                print(f"  {label:<10} p50 {np.percentile(ms, 50):8.2f} ms   {plan_summary(queryset)}")
+        raise Rollback
+except Rollback:
+    pass
+print("="*70)
@@ -0,0 +1,94 @@
+"""
+Benchmark the ML predictor backends of /api/predict-specialist/
+Compares end-to-end latency of the endpoint (prediction + doctor ranking)
+with the 'http' backend (Flask ML API must be running on port 5174) and the
+'inprocess' backend (model loaded inside this process).
+
+Saved predictions are turned off (ML_SAVED_PREDICTIONS=False), so every
+request runs the model instead of a SymptomPrediction lookup, and the run is
+rolled back - nothing is left in the database.
+
+Usage:
+    python benchmark_ml_predict.py [requests_per_backend]
+"""
+import os
+import sys
+import json
+import time
+import django
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'healthcare_backend.settings')
+django.setup()
+
+import numpy as np
+from django.db import transaction
+from django.test import Client
+from django.test.utils import override_settings, setup_test_environment
+
+from api.ml_predictors import PredictionError, get_predictor
+
+SYMPTOM_SETS = [
+    ["chills", "vomiting", "high_fever", "abdominal_pain"],
+    ["itching", "skin_rash", "nodal_skin_eruptions"],
+    ["cough", "chest_pain", "breathlessness"],
+    ["headache", "dizziness", "loss_of_balance"],
+    ["joint_pain", "swelling_joints", "movement_stiffness"],
+]
+
+N = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+
+setup_test_environment()
+client = Client()
+
+
+class Rollback(Exception):
+    pass
+
+
+def run(backend):
+    with override_settings(ML_PREDICTOR_BACKEND=backend, ML_SAVED_PREDICTIONS=False):
+        try:
+            # Warm-up: connection setup / model loading is not part of the timing
+            get_predictor().predict(SYMPTOM_SETS[0])
+        except PredictionError as e:
+            print(f"✗ {backend}: {e} (status {e.status_code}) - skipped")
+            return None
+
+        timings = []
+        predictions = []
+        for i in range(N):
+            body = json.dumps({'symptoms': SYMPTOM_SETS[i % len(SYMPTOM_SETS)], 'top_k': 3})
+            start = time.perf_counter()
+            response = client.post('/api/predict-specialist/', body, content_type='application/json')
+            timings.append(time.perf_counter() - start)
+            if response.status_code != 200:
+                print(f"✗ {backend}: status {response.status_code} {response.content[:200]}")
+                return None
+            if i < len(SYMPTOM_SETS):
+                predictions.append(response.json()['predicted_specialist'])
+
+        timings = np.array(timings) * 1000
+        print(f"{backend:<10} p50 {np.percentile(timings, 50):7.2f} ms   "
+              f"p99 {np.percentile(timings, 99):7.2f} ms   mean {timings.mean():7.2f} ms")
+        return predictions
+
+
+print("\n" + "="*70)
+print(f"  PREDICT-SPECIALIST END-TO-END LATENCY ({N} requests per backend)")
+print("="*70)
+
+try:
+    with transaction.atomic():
+        http_predictions = run('http')
+        inprocess_predictions = run('inprocess')
+        raise Rollback
+except Rollback:
+    pass
+
+if http_predictions and inprocess_predictions:
+    if http_predictions == inprocess_predictions:
+        print("\n✓ Both backends predict the same specialists")
+    else:
+        print(f"\n✗ Predictions differ: {http_predictions} vs {inprocess_predictions}")
+print("="*70)
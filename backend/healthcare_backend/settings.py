@@ -20,6 +20,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'rest_framework.authtoken',
     'corsheaders',
@@ -134,6 +135,47 @@ REST_FRAMEWORK = {
     'PAGE_SIZE': 100,
 }
 
+# ML specialist prediction
+# 'http' calls the Flask ML API at ML_API_URL; 'inprocess' loads the model
+# from ML_SERVICE_DIR inside each Django worker (needs the ML requirements)
+ML_PREDICTOR_BACKEND = config('ML_PREDICTOR_BACKEND', default='http')
+ML_API_URL = config('ML_API_URL', default='http://127.0.0.1:5174/predict')
+ML_API_CONNECT_TIMEOUT = config('ML_API_CONNECT_TIMEOUT', default=1.0, cast=float)
+ML_API_READ_TIMEOUT = config('ML_API_READ_TIMEOUT', default=5.0, cast=float)
+ML_API_RETRIES = config('ML_API_RETRIES', default=2, cast=int)
+ML_API_POOL_SIZE = config('ML_API_POOL_SIZE', default=10, cast=int)
+# Consecutive failures that open the circuit, and seconds before a trial call
+ML_API_BREAKER_THRESHOLD = config('ML_API_BREAKER_THRESHOLD', default=5, cast=int)
+ML_API_BREAKER_RESET = config('ML_API_BREAKER_RESET', default=30, cast=float)
+# Seconds the model version read from the ML API is trusted when looking up
+# saved predictions; 0 re-reads it for every lookup
+ML_API_VERSION_TTL = config('ML_API_VERSION_TTL', default=30, cast=float)
+ML_SERVICE_DIR = config('ML_SERVICE_DIR', default=str(BASE_DIR.parent / 'New folder' / 'ML'))
+ML_MODEL_NTHREAD = config('ML_MODEL_NTHREAD', default=1, cast=int)
+# Store predictions and reuse them for repeated symptom sets; False always
+# runs the model and writes nothing (benchmarks, load tests)
+ML_SAVED_PREDICTIONS = config('ML_SAVED_PREDICTIONS', default=True, cast=bool)
+
+# Doctor ranking: ratings are Bayesian-smoothed, i.e. each doctor's average is
+# pulled toward the mean of all ratings as if it had RANKING_RATING_PRIOR_WEIGHT
+# extra reviews at that mean (cached for RANKING_RATING_PRIOR_TTL seconds)
+RANKING_RATING_PRIOR_WEIGHT = config('RANKING_RATING_PRIOR_WEIGHT', default=10, cast=float)
+RANKING_RATING_PRIOR_TTL = config('RANKING_RATING_PRIOR_TTL', default=300, cast=int)
+# Stored ranking scores computed with a prior further than this (in stars)
+# from the current one are refreshed after a feedback change
+RANKING_PRIOR_REFRESH_TOLERANCE = config('RANKING_PRIOR_REFRESH_TOLERANCE', default=0.01, cast=float)
+# Longest time (seconds) a process keeps using cached weight profiles, for
+# cache backends that don't share the profile version between processes
+RANKING_WEIGHTS_CACHE_TTL = config('RANKING_WEIGHTS_CACHE_TTL', default=60, cast=float)
+
+# Nearby-doctor search (?near=lat,lng&radius=km): radius used when none is
+# given, and the largest one accepted
+DOCTOR_NEAR_DEFAULT_RADIUS_KM = config('DOCTOR_NEAR_DEFAULT_RADIUS_KM', default=25, cast=float)
+DOCTOR_NEAR_MAX_RADIUS_KM = config('DOCTOR_NEAR_MAX_RADIUS_KM', default=200, cast=float)
+# Seconds a process trusts its check for the doctor search trigram indexes
+# (api/doctor_search.py) before looking again
+DOCTOR_SEARCH_INDEX_TTL = config('DOCTOR_SEARCH_INDEX_TTL', default=300, cast=float)
+
 # Media files (uploaded by users)
 import os
 MEDIA_URL = '/media/'
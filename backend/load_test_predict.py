@@ -0,0 +1,135 @@
+"""
+Load test: predict-specialist under WSGI vs ASGI
+Sends the same concurrent load to the sync endpoint served by a WSGI server
+and to the async endpoint served by an ASGI server, each with ONE worker
+process, to show how many in-flight predictions one worker can multiplex.
+
+The ML Flask API must be running on port 5174 (ML_PREDICTOR_BACKEND=http).
+
+The servers must run with ML_SAVED_PREDICTIONS=False, so every request runs
+the model instead of a SymptomPrediction lookup and nothing is written to the
+database; --start sets it. To keep the load off the real database, run them
+against a copy (createdb -T healthcare_db healthcare_loadtest) with
+DATABASE_NAME, or --database-name with --start.
+
+Usage:
+    # against servers you started yourself, e.g.
+    #   export ML_SAVED_PREDICTIONS=False DATABASE_NAME=healthcare_loadtest
+    #   gunicorn healthcare_backend.wsgi:application -w 1 --threads 4 -b 127.0.0.1:8000
+    #   uvicorn healthcare_backend.asgi:application --workers 1 --port 8001
+    python load_test_predict.py --wsgi-url http://127.0.0.1:8000 --asgi-url http://127.0.0.1:8001
+
+    # or let the script start both (needs gunicorn and uvicorn installed)
+    python load_test_predict.py --start --database-name healthcare_loadtest
+"""
+import sys
+import io
+sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+import argparse
+import os
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+SYMPTOM_SETS = [
+    ["chills", "vomiting", "high_fever", "abdominal_pain"],
+    ["itching", "skin_rash", "nodal_skin_eruptions"],
+    ["cough", "chest_pain", "breathlessness"],
+    ["headache", "dizziness", "loss_of_balance"],
+    ["joint_pain", "swelling_joints", "movement_stiffness"],
+]
+
+_local = threading.local()
+
+
+def send(url, i):
+    session = getattr(_local, 'session', None)
+    if session is None:
+        session = _local.session = requests.Session()
+
+    start = time.perf_counter()
+    try:
+        response = session.post(url, json={'symptoms': SYMPTOM_SETS[i % len(SYMPTOM_SETS)], 'limit': 10}, timeout=60)
+        ok = response.status_code == 200
+    except requests.RequestException:
+        ok = False
+    return time.perf_counter() - start, ok
+
+
+def run_load(url, n_requests, concurrency):
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        results = list(pool.map(lambda i: send(url, i), range(n_requests)))
+    elapsed = time.perf_counter() - start
+
+    timings = sorted(t * 1000 for t, _ in results)
+    errors = sum(1 for _, ok in results if not ok)
+    p50 = timings[len(timings) // 2]
+    p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+    return n_requests / elapsed, p50, p99, errors
+
+
+def wait_until_up(url, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            requests.get(url, timeout=1)
+            return
+        except requests.RequestException:
+            time.sleep(0.5)
+    raise RuntimeError(f"Server at {url} did not start within {timeout}s")
+
+
+def report(label, throughput, p50, p99, errors):
+    print(f"{label:<6} {throughput:8.1f} req/s   p50 {p50:8.2f} ms   p99 {p99:8.2f} ms   errors {errors}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compare predict-specialist under WSGI and ASGI')
+    parser.add_argument('--wsgi-url', default='http://127.0.0.1:8000')
+    parser.add_argument('--asgi-url', default='http://127.0.0.1:8001')
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--wsgi-threads', type=int, default=4, help='threads of the WSGI worker started by --start')
+    parser.add_argument('--start', action='store_true', help='start gunicorn and uvicorn (one worker each)')
+    parser.add_argument('--database-name', help='DATABASE_NAME of the servers started by --start')
+    args = parser.parse_args()
+
+    servers = []
+    if args.start:
+        backend_dir = os.path.dirname(os.path.abspath(__file__))
+        wsgi_port = args.wsgi_url.rsplit(':', 1)[1]
+        asgi_port = args.asgi_url.rsplit(':', 1)[1]
+        env = dict(os.environ, ML_SAVED_PREDICTIONS='False')
+        if args.database_name:
+            env['DATABASE_NAME'] = args.database_name
+        servers.append(subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', 'healthcare_backend.wsgi:application',
+             '-w', '1', '--threads', str(args.wsgi_threads), '-b', f'127.0.0.1:{wsgi_port}'],
+            cwd=backend_dir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        ))
+        servers.append(subprocess.Popen(
+            [sys.executable, '-m', 'uvicorn', 'healthcare_backend.asgi:application',
+             '--workers', '1', '--port', asgi_port, '--log-level', 'warning'],
+            cwd=backend_dir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        ))
+
+    try:
+        print("\n" + "="*70)
+        print(f"  PREDICT-SPECIALIST: {args.requests} requests, {args.concurrency} concurrent clients")
+        print("="*70)
+
+        for label, url in (('WSGI', f'{args.wsgi_url}/api/predict-specialist/'),
+                           ('ASGI', f'{args.asgi_url}/api/predict-specialist/async/')):
+            wait_until_up(url)
+            send(url, 0)  # warm-up
+            report(label, *run_load(url, args.requests, args.concurrency))
+        print("="*70)
+    finally:
+        for server in servers:
+            server.terminate()
+            server.wait()
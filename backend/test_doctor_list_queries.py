@@ -0,0 +1,91 @@
+"""
+Query-count regression test for the doctor listings
+The patient doctor list and the ranked by-specialty list must take the same
+number of SQL queries whatever the page size (no per-doctor queries from
+DoctorSerializer).
+
+Needs approved doctors (with bank account and pricing) in the database.
+
+Usage:
+    python test_doctor_list_queries.py
+"""
+import os
+import sys
+import django
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'healthcare_backend.settings')
+django.setup()
+
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, setup_test_environment
+from rest_framework.pagination import PageNumberPagination
+
+from api.models import Doctor
+from api.views import DoctorViewSet
+
+PAGE_SIZES = [1, 5, 50]
+
+setup_test_environment()
+client = Client()
+failed = False
+
+
+def count_queries(url):
+    client.get(url)  # warm-up: cached rating prior and weight profiles
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url)
+    if response.status_code != 200:
+        print(f"✗ {url}: status {response.status_code}")
+        sys.exit(1)
+    data = response.json()
+    doctors = data['results'] if isinstance(data, dict) else data
+    return len(queries), len(doctors)
+
+
+def check(label, counts):
+    global failed
+    for (page_size, (queries, doctors)) in counts:
+        print(f"  page size {page_size:>3}: {doctors:>3} doctors, {queries} queries")
+    if len({queries for _, (queries, _) in counts}) == 1:
+        print(f"✓ {label}: same number of queries for every page size")
+    else:
+        print(f"✗ {label}: query count grows with the page size")
+        failed = True
+
+
+print("\n" + "="*70)
+print("  DOCTOR LIST QUERY COUNT")
+print("="*70)
+
+# 1. Patient doctor list (DoctorViewSet.list), full and compact
+original_pagination = DoctorViewSet.pagination_class
+for url in ('/api/doctors/', '/api/doctors/?compact=true'):
+    print(f"\n1. {url}")
+    counts = []
+    try:
+        for page_size in PAGE_SIZES:
+            DoctorViewSet.pagination_class = type('Pagination', (PageNumberPagination,), {'page_size': page_size})
+            counts.append((page_size, count_queries(url)))
+    finally:
+        DoctorViewSet.pagination_class = original_pagination
+    check(url, counts)
+
+# 2. Ranked doctors of one specialty
+specialty = (
+    Doctor.objects.filter(approval_status='approved', is_blocked=False)
+    .values_list('specialty', flat=True).first()
+)
+if specialty:
+    print(f"\n2. /api/doctors/by-specialty/?specialty={specialty}")
+    counts = [
+        (page_size, count_queries(f'/api/doctors/by-specialty/?specialty={specialty}&limit={page_size}'))
+        for page_size in PAGE_SIZES
+    ]
+    check('by-specialty', counts)
+else:
+    print("\n2. No approved doctors - by-specialty skipped")
+
+print("="*70)
+sys.exit(1 if failed else 0)
@@ -0,0 +1,100 @@
+"""
+Keyset pagination test
+Walks the keyset-paginated list endpoints page by page (forwards through the
+next links, then back through the previous links) with a small page size and
+checks that every row is returned exactly once, in the endpoint's order,
+without OFFSET or COUNT(*) queries.
+
+Needs appointments (and optionally transactions, notifications, messages) in
+the database.
+
+Usage:
+    python test_keyset_pagination.py
+"""
+import os
+import sys
+import django
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'healthcare_backend.settings')
+django.setup()
+
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, setup_test_environment
+
+from api.models import Appointment, Message, Notification, Transaction
+from api.views import AppointmentViewSet, MessageViewSet, NotificationViewSet, TransactionViewSet
+
+PAGE_SIZE = 7
+
+ENDPOINTS = [
+    ('/api/appointments/', AppointmentViewSet, Appointment),
+    ('/api/transactions/', TransactionViewSet, Transaction),
+    ('/api/notifications/', NotificationViewSet, Notification),
+    ('/api/messages/', MessageViewSet, Message),
+]
+
+setup_test_environment()
+client = Client()
+failed = False
+
+
+def fetch(url):
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url)
+    if response.status_code != 200:
+        print(f"✗ {url}: status {response.status_code}")
+        sys.exit(1)
+    sql = ' '.join(query['sql'] for query in queries).upper()
+    return response.json(), 'OFFSET' in sql or 'COUNT(' in sql
+
+
+def walk(url, link):
+    """Follow link from url; returns the pages' ids, the last url and whether any page used OFFSET/COUNT"""
+    pages, slow = [], False
+    while True:
+        data, slow_page = fetch(url)
+        pages.append([str(row['id']) for row in data['results']])
+        slow = slow or slow_page
+        if not data[link]:
+            return pages, url, slow
+        url = data[link]
+
+
+def check(label, ok):
+    global failed
+    print(f"{'✓' if ok else '✗'} {label}")
+    failed = failed or not ok
+
+
+print("\n" + "="*70)
+print(f"  KEYSET PAGINATION (page size {PAGE_SIZE})")
+print("="*70)
+
+for url, view, model in ENDPOINTS:
+    pagination = view.pagination_class
+    expected = [str(pk) for pk in model.objects.order_by(*pagination.ordering).values_list('id', flat=True)]
+    if not expected:
+        print(f"\n- {url}: no rows, skipped")
+        continue
+
+    print(f"\n{url}: {len(expected)} rows")
+    view.pagination_class = type('Pagination', (pagination,), {'page_size': PAGE_SIZE})
+    try:
+        forward, last_url, slow_forward = walk(url, 'next')
+        backward, _, slow_backward = walk(last_url, 'previous')
+    finally:
+        view.pagination_class = pagination
+
+    check(f"forward: {len(forward)} pages in order", [pk for page in forward for pk in page] == expected)
+    check("backward: same pages", backward[::-1] == forward)
+    check("no OFFSET / COUNT(*) queries", not (slow_forward or slow_backward))
+
+    data, _ = fetch(f'{url}?with_count=true')
+    check("?with_count=true adds the total", data.get('count') == len(expected))
+
+print("\n" + "="*70)
+print("✗ FAILED" if failed else "✓ All keyset pagination checks passed")
+print("="*70)
+sys.exit(1 if failed else 0)